@@ -0,0 +1,136 @@
+"""DiskCache.py
+  A small content-addressed on-disk cache with size-bounded LRU eviction.
+  Each entry is stored as one file named after its key (a SHA-256 hex digest) and
+  suffix; other files in the directory are left alone. The file modification
+  time is refreshed on every hit and is used as the LRU order when pruning.
+  Usage: python DiskCache.py <cache_dir> <command> [max_mb]
+    command: stats | list | prune | clear
+  Example: python DiskCache.py .tts_cache prune 200
+"""
+import hashlib
+import json
+import os
+import re
+import sys
+import tempfile
+from typing import List, Optional, Tuple
+
+def make_key(*parts) -> str:
+  """Build a stable hex digest from the given key parts."""
+  payload = json.dumps(parts, ensure_ascii=False, separators=(",", ":"))
+  return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class DiskCache:
+  """Directory-backed key/value store for bytes with LRU eviction."""
+
+  def __init__(self, directory: str, max_bytes: int = 512 * 1024 * 1024, suffix: Optional[str] = ".bin"):
+    """A suffix of None matches entries with any suffix, for inspecting a cache without writing to it."""
+    self.directory = directory
+    self.max_bytes = max_bytes
+    self.suffix = suffix
+    any_suffix = r"(\.[A-Za-z0-9]+)?"
+    self.entry_pattern = re.compile(r"[0-9a-f]{64}" + (any_suffix if suffix is None else re.escape(suffix)))
+    os.makedirs(self.directory, exist_ok=True)
+
+  def _path(self, key: str) -> str:
+    return os.path.join(self.directory, key + self.suffix)
+
+  def get(self, key: str) -> Optional[bytes]:
+    """Return the cached bytes for key, or None on a miss."""
+    path = self._path(key)
+    try:
+      with open(path, "rb") as f:
+        data = f.read()
+      # mark as most recently used
+      os.utime(path, None)
+      return data
+    except FileNotFoundError:
+      return None
+
+  def put(self, key: str, data: bytes):
+    """Store data under key and evict old entries if over the size limit."""
+    fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+    try:
+      with os.fdopen(fd, "wb") as f:
+        f.write(data)
+      os.replace(tmp_path, self._path(key))
+    except Exception:
+      if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+      raise
+    self.prune()
+
+  def entries(self) -> List[Tuple[str, int, float]]:
+    """List (path, size, mtime) of all entries, least recently used first."""
+    entries = []
+    for name in os.listdir(self.directory):
+      # temp files belong to writers that may still be running
+      if name.endswith(".tmp") or not self.entry_pattern.fullmatch(name):
+        continue
+      path = os.path.join(self.directory, name)
+      try:
+        stat = os.stat(path)
+      except FileNotFoundError:
+        continue
+      entries.append((path, stat.st_size, stat.st_mtime))
+    entries.sort(key=lambda entry: entry[2])
+    return entries
+
+  def total_bytes(self) -> int:
+    """Return the total size of all entries."""
+    return sum(size for _, size, _ in self.entries())
+
+  def prune(self, max_bytes: int = None) -> int:
+    """Evict least recently used entries until the cache fits in max_bytes."""
+    if max_bytes is None:
+      max_bytes = self.max_bytes
+    entries = self.entries()
+    total = sum(size for _, size, _ in entries)
+    removed = 0
+    for path, size, _ in entries:
+      if total <= max_bytes:
+        break
+      try:
+        os.remove(path)
+      except FileNotFoundError:
+        pass
+      total -= size
+      removed += 1
+    return removed
+
+  def clear(self) -> int:
+    """Remove all entries."""
+    return self.prune(0)
+
+if __name__ == "__main__":
+  if len(sys.argv) < 3 or sys.argv[2] not in ["stats", "list", "prune", "clear"]:
+    print("Usage: python DiskCache.py <cache_dir> <stats|list|prune|clear> [max_mb]")
+    print("Example: python DiskCache.py .tts_cache prune 200")
+    sys.exit(1)
+
+  cache_dir = sys.argv[1]
+  command = sys.argv[2]
+  if not os.path.isdir(cache_dir):
+    print(f"Cache directory '{cache_dir}' does not exist.")
+    sys.exit(1)
+
+  # the suffix does not matter for inspection, so match entries with any suffix
+  cache = DiskCache(cache_dir, suffix=None)
+  entries = cache.entries()
+
+  if command == "stats":
+    total = sum(size for _, size, _ in entries)
+    print(f"Entries: {len(entries)}")
+    print(f"Total size: {total / (1024 * 1024):.2f} MB")
+  elif command == "list":
+    for path, size, mtime in entries:
+      print(f"{os.path.basename(path)}\t{size}\t{mtime:.0f}")
+  elif command == "prune":
+    if len(sys.argv) < 4:
+      print("prune requires a size limit in MB.")
+      sys.exit(1)
+    removed = cache.prune(int(float(sys.argv[3]) * 1024 * 1024))
+    print(f"Removed {removed} entries.")
+  else:
+    removed = cache.clear()
+    print(f"Removed {removed} entries.")
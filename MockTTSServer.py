@@ -0,0 +1,208 @@
+"""MockTTSServer.py
+  Local stand-in for the OpenAI speech endpoint, for load testing the TTS stage offline.
+  It answers POST /v1/audio/speech like the real API, after a configurable latency,
+  and can inject server errors and 429 responses (with Retry-After) and cap the
+  throughput in requests per minute and concurrent requests.
+  The audio is silent WAV whose length grows with the input text, whatever
+  response_format is requested; ffmpeg detects the format from the content.
+  Point Text2Movie at it with --tts-base-url http://127.0.0.1:8766/v1 (no API key needed).
+  Usage: python MockTTSServer.py [--port 8766] [--latency-ms 300] [--latency-dist lognormal]
+                                 [--error-rate 0.01] [--throttle-rate 0.05] [--rpm 50] [--max-concurrent 8]
+  Example: python MockTTSServer.py --latency-ms 500 --throttle-rate 0.1 --rpm 100
+
+  Endpoints:
+    POST /v1/audio/speech  {"model": "tts-1", "voice": "alloy", "input": ..., "response_format": "mp3"}
+    GET  /stats            request counters
+"""
+import argparse
+import io
+import json
+import math
+import random
+import threading
+import time
+import wave
+from dataclasses import asdict, dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_PORT = 8766
+SAMPLE_RATE = 24000
+CHARACTERS_PER_SECOND = 15.0  # rough speaking rate used for the audio length
+
+@dataclass
+class MockSettings:
+  """Behavior of the mock server."""
+  latency_ms: float = 300.0  # mean response latency
+  latency_dist: str = "lognormal"  # fixed, uniform, exponential or lognormal
+  latency_spread: float = 0.5  # lognormal sigma, or relative half-width for uniform
+  error_rate: float = 0.0  # share of requests answered with 500
+  throttle_rate: float = 0.0  # share of requests answered with 429
+  retry_after: float = 1.0  # Retry-After seconds sent with injected 429s
+  rpm: float = 0.0  # requests per minute before answering 429, unlimited if 0
+  max_concurrent: int = 0  # requests handled at the same time before answering 429, unlimited if 0
+  seed: int = None
+
+@dataclass
+class MockStats:
+  """Counters of what the mock server answered."""
+  requests: int = 0
+  ok: int = 0
+  throttled: int = 0
+  errors: int = 0
+  in_flight: int = 0
+  max_in_flight: int = 0
+
+class MockTTSState:
+  """Shared state of all request threads: settings, counters and throughput caps."""
+
+  def __init__(self, settings: MockSettings):
+    self.settings = settings
+    self.stats = MockStats()
+    self.random = random.Random(settings.seed)
+    self.lock = threading.Lock()
+    self.tokens = max(1.0, settings.rpm / 10.0)
+    self.last_refill = time.monotonic()
+
+  def count(self, **increments):
+    with self.lock:
+      for name, value in increments.items():
+        setattr(self.stats, name, getattr(self.stats, name) + value)
+
+  def admit(self) -> tuple:
+    """Decide how to answer a new request: (status, retry_after seconds)."""
+    settings = self.settings
+    with self.lock:
+      self.stats.requests += 1
+      if settings.max_concurrent and self.stats.in_flight >= settings.max_concurrent:
+        return 429, settings.retry_after
+      if settings.rpm:
+        # token bucket with a burst of a tenth of the per-minute quota
+        now = time.monotonic()
+        rate = settings.rpm / 60.0
+        self.tokens = min(max(1.0, settings.rpm / 10.0), self.tokens + (now - self.last_refill) * rate)
+        self.last_refill = now
+        if self.tokens < 1.0:
+          return 429, (1.0 - self.tokens) / rate
+        self.tokens -= 1.0
+      roll = self.random.random()
+      if roll < settings.throttle_rate:
+        return 429, settings.retry_after
+      if roll < settings.throttle_rate + settings.error_rate:
+        return 500, None
+      self.stats.in_flight += 1
+      self.stats.max_in_flight = max(self.stats.max_in_flight, self.stats.in_flight)
+      return 200, None
+
+  def latency(self) -> float:
+    """Draw a response latency in seconds."""
+    settings = self.settings
+    mean = settings.latency_ms / 1000.0
+    with self.lock:
+      if settings.latency_dist == "uniform":
+        return self.random.uniform(mean * (1 - settings.latency_spread), mean * (1 + settings.latency_spread))
+      if settings.latency_dist == "exponential":
+        return self.random.expovariate(1 / mean) if mean > 0 else 0.0
+      if settings.latency_dist == "lognormal" and mean > 0:
+        # mu is chosen so that the distribution's mean is latency_ms
+        sigma = settings.latency_spread
+        return self.random.lognormvariate(math.log(mean) - sigma * sigma / 2, sigma)
+      return mean
+
+def create_silent_wav(text: str) -> bytes:
+  """Silent 16-bit mono WAV, about as long as reading the text aloud."""
+  frames = int(max(0.5, len(text) / CHARACTERS_PER_SECOND) * SAMPLE_RATE)
+  buffer = io.BytesIO()
+  with wave.open(buffer, "wb") as wav_file:
+    wav_file.setnchannels(1)
+    wav_file.setsampwidth(2)
+    wav_file.setframerate(SAMPLE_RATE)
+    wav_file.writeframes(bytes(2 * frames))
+  return buffer.getvalue()
+
+class MockTTSHandler(BaseHTTPRequestHandler):
+  """Answer speech requests the way the OpenAI API does, with the configured faults."""
+  state: MockTTSState = None
+
+  def log_message(self, format, *args):
+    pass  # one line per request would drown the load test output
+
+  def send_body(self, status: int, body: bytes, content_type: str, headers: dict = None):
+    self.send_response(status)
+    self.send_header("Content-Type", content_type)
+    self.send_header("Content-Length", str(len(body)))
+    for name, value in (headers or {}).items():
+      self.send_header(name, value)
+    self.end_headers()
+    self.wfile.write(body)
+
+  def send_error_json(self, status: int, message: str, error_type: str, headers: dict = None):
+    body = json.dumps({"error": {"message": message, "type": error_type, "param": None, "code": None}})
+    self.send_body(status, body.encode("utf-8"), "application/json", headers)
+
+  def do_GET(self):
+    if self.path != "/stats":
+      self.send_error_json(404, "not found", "invalid_request_error")
+      return
+    self.send_body(200, json.dumps(asdict(self.state.stats)).encode("utf-8"), "application/json")
+
+  def do_POST(self):
+    if self.path.rstrip("/") != "/v1/audio/speech":
+      self.send_error_json(404, "not found", "invalid_request_error")
+      return
+    try:
+      length = int(self.headers.get("Content-Length", 0))
+      request = json.loads(self.rfile.read(length).decode("utf-8"))
+      text = request["input"]
+    except (ValueError, KeyError) as e:
+      self.send_error_json(400, f"bad request: {e}", "invalid_request_error")
+      return
+
+    status, retry_after = self.state.admit()
+    if status == 429:
+      self.state.count(throttled=1)
+      self.send_error_json(429, "Rate limit reached for requests", "requests",
+                           {"retry-after": f"{retry_after:.3f}", "retry-after-ms": str(int(retry_after * 1000))})
+      return
+    if status == 500:
+      self.state.count(errors=1)
+      self.send_error_json(500, "The server had an error while processing your request.", "server_error")
+      return
+
+    try:
+      time.sleep(self.state.latency())
+      self.send_body(200, create_silent_wav(text), "audio/wav")
+      self.state.count(ok=1)
+    finally:
+      self.state.count(in_flight=-1)
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(description="Local stand-in for the OpenAI speech endpoint")
+  parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+  parser.add_argument("--latency-ms", type=float, default=300.0, help="mean response latency (default: 300)")
+  parser.add_argument("--latency-dist", choices=["fixed", "uniform", "exponential", "lognormal"],
+                      default="lognormal")
+  parser.add_argument("--latency-spread", type=float, default=0.5,
+                      help="lognormal sigma, or relative half-width of the uniform distribution")
+  parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests answered with 500")
+  parser.add_argument("--throttle-rate", type=float, default=0.0, help="share of requests answered with 429")
+  parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After seconds of injected 429s")
+  parser.add_argument("--rpm", type=float, default=0.0, help="requests per minute before 429, unlimited if 0")
+  parser.add_argument("--max-concurrent", type=int, default=0,
+                      help="concurrent requests before 429, unlimited if 0")
+  parser.add_argument("--seed", type=int, help="random seed for reproducible faults and latencies")
+  args = parser.parse_args()
+
+  MockTTSHandler.state = MockTTSState(MockSettings(
+    latency_ms=args.latency_ms, latency_dist=args.latency_dist, latency_spread=args.latency_spread,
+    error_rate=args.error_rate, throttle_rate=args.throttle_rate, retry_after=args.retry_after,
+    rpm=args.rpm, max_concurrent=args.max_concurrent, seed=args.seed
+  ))
+  server = ThreadingHTTPServer(("127.0.0.1", args.port), MockTTSHandler)
+  print(f"Mock TTS server listening on http://127.0.0.1:{args.port}/v1")
+  try:
+    server.serve_forever()
+  except KeyboardInterrupt:
+    pass
+  finally:
+    server.server_close()
+    print(json.dumps(asdict(MockTTSHandler.state.stats)))
@@ -1,56 +1,1205 @@
 """Speak2Text.py
   This script transcribes audio files to text using the Whisper ASR model.
-  It accepts an audio file path and model size as command line arguments.
-  Usage: python Speak2Text.py <audio_file_path> <model_size>
+  It accepts audio file paths and model size as command line arguments.
+  A single file is written to transcription.txt (or .json/.jsonl/.srt/.vtt). Several files, or a directory,
+  are transcribed in batch with one model load, and each transcription is
+  written next to its audio file.
+  With --server it sends the request to a running WhisperServer.py instead of
+  loading the model itself. With --workers, long recordings are split at silences
+  and the chunks are transcribed in parallel processes. With --vad, silent parts
+  are removed before inference and timestamps are mapped back afterwards.
+  Results are cached by audio content and settings (see DiskCache.py).
+  --backend selects int8 CPU inference: dynamically quantized Whisper or a
+  CTranslate2 model (faster-whisper) loaded from --model-dir.
+  With --stream, text is appended to the output file as each part of the audio
+  is decoded, and an interrupted run resumes from its last checkpoint.
+  --format writes segments with timestamps and confidences as JSON, JSON lines,
+  SRT or WebVTT instead of plain text.
+  --threads and --interop-threads set torch's thread pools. With --jobs, batch
+  files are transcribed in parallel processes, each pinned to its own share of
+  the cores so concurrent jobs don't oversubscribe them.
+  Every file gets a metrics record with the time spent in each stage, the real-time
+  factor and peak memory; --metrics appends the records to a JSON lines file.
+  Usage: python Speak2Text.py <audio_file_path|directory>... <model_size> [options]
   Example: python Speak2Text.py audio.wav base
+           python Speak2Text.py lessons/ small
+           python Speak2Text.py audio.wav base --server http://127.0.0.1:8765
+           python Speak2Text.py lesson.mp3 small --workers 4
+           python Speak2Text.py lesson.mp3 small --vad
+           python Speak2Text.py lesson.mp3 medium --backend whisper-int8
+           python Speak2Text.py lesson.mp3 small --stream --jsonl
+           python Speak2Text.py lesson.mp3 small --format srt
+           python Speak2Text.py lessons/ small --jobs 4
+           python Speak2Text.py lessons/ small --metrics metrics.jsonl
   """
-import whisper
+import argparse
+import bisect
+import contextlib
+import hashlib
+import math
+import json
+import os
+import threading
 import time
 import sys
+from dataclasses import asdict, dataclass, field, replace
+from typing import Optional
+from DiskCache import DiskCache, make_key
 
-def transcribe_audio(file_path, model_size="base"):
+MODEL_SIZES = ["tiny", "base", "small", "medium", "large"]
+BACKENDS = ["whisper", "whisper-int8", "ctranslate2"]
+OUTPUT_FORMATS = ["txt", "json", "jsonl", "srt", "vtt"]
+AUDIO_EXTENSIONS = [".wav", ".mp3", ".m4a", ".flac", ".ogg", ".opus", ".webm", ".mp4", ".aac"]
+SAMPLE_RATE = 16000  # whisper.audio.SAMPLE_RATE
+
+_models = {}
+_models_lock = threading.Lock()
+
+@dataclass
+class TranscribeOptions:
+  """Settings for how audio is transcribed."""
+  language: str = "en"
+  backend: str = "whisper"  # one of BACKENDS
+  model_dir: Optional[str] = None  # local CTranslate2 model directory for the ctranslate2 backend
+  threads: Optional[int] = None  # torch intra-op threads, torch default if None
+  interop_threads: Optional[int] = None  # torch inter-op threads, torch default if None
+  jobs: int = 1  # files transcribed at the same time in batch mode
+  workers: int = 1  # processes for chunked transcription of long audio
+  chunk_seconds: float = 60.0
+  overlap_seconds: float = 1.0
+  vad: bool = False  # skip non-speech regions before inference
+  vad_threshold_db: float = -30.0  # speech threshold relative to the loud parts of the audio
+  output_format: str = "txt"  # one of OUTPUT_FORMATS
+  stream: bool = False  # append text to the output as it is decoded, with checkpoints
+  stream_seconds: float = 30.0
+  stream_jsonl: bool = False  # also print each decoded segment as a JSON line
+  cache_dir: Optional[str] = ".transcript_cache"  # None disables the transcript cache
+  cache_max_mb: int = 256
+  metrics_file: Optional[str] = None  # JSON lines file the metrics records are appended to
+
+  def cache_settings(self):
+    """Return the settings that change the transcription result."""
+    chunked = self.workers > 1
+    return {
+      "backend": self.backend,
+      "model_dir": self.model_dir,
+      "language": self.language,
+      "vad": self.vad,
+      "vad_threshold_db": self.vad_threshold_db if self.vad else None,
+      "chunk_seconds": self.chunk_seconds if chunked else None,
+      "overlap_seconds": self.overlap_seconds if chunked else None,
+    }
+
+@dataclass
+class TranscribeMetrics:
+  """Where the time of one transcription went.
+
+  Stages: cache (hash and lookup), load (model), audio_decode, vad, and for the
+  whisper backends features (mel spectrogram), encoder and decoder (the token
+  loop); ctranslate2 and chunked runs report a single inference stage.
+  format is the time spent formatting and writing the output.
+  """
+  file: str
+  model_size: str = "base"
+  backend: str = "whisper"
+  audio_seconds: float = 0.0
+  wall_seconds: float = 0.0
+  cached: bool = False
+  peak_rss_mb: Optional[float] = None
+  stages: dict = field(default_factory=dict)
+
+  def add(self, stage, seconds):
+    self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+  @contextlib.contextmanager
+  def stage(self, stage):
+    start_time = time.perf_counter()
+    try:
+      yield
+    finally:
+      self.add(stage, time.perf_counter() - start_time)
+
+  @property
+  def rtf(self):
+    return self.wall_seconds / max(self.audio_seconds, 1e-6)
+
+  def finish(self, wall_seconds):
+    """Record the total time and the peak memory of this process."""
+    self.wall_seconds = wall_seconds
+    self.peak_rss_mb = peak_rss_mb()
+
+  def record(self):
+    """Return the metrics as a JSON-serializable dict."""
+    record = asdict(self)
+    record["wall_seconds"] = round(self.wall_seconds, 4)
+    record["rtf"] = round(self.rtf, 4)
+    record["stages"] = {stage: round(seconds, 4) for stage, seconds in self.stages.items()}
+    record["timestamp"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+    return record
+
+  def summary(self):
+    stages = ", ".join(f"{stage} {seconds:.2f}s" for stage, seconds in self.stages.items())
+    rss = f", peak RSS {self.peak_rss_mb:.0f} MB" if self.peak_rss_mb is not None else ""
+    return f"Stages: {stages} (RTF {self.rtf:.3f}{rss})"
+
+def peak_rss_mb():
+  """
+  Return the peak resident set size of this process.
+
+  Returns:
+      float: Peak RSS in MB, or None where the resource module is unavailable (Windows).
+  """
+  try:
+    import resource
+  except ImportError:
+    return None
+  peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+  # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+  return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def write_metrics(metrics, metrics_file):
+  """
+  Append a metrics record to a JSON lines file.
+
+  Args:
+      metrics (TranscribeMetrics): Metrics of one transcription.
+      metrics_file (str): Path to the JSON lines file.
+  """
+  with open(metrics_file, "a", encoding="utf-8") as f:
+    f.write(json.dumps(metrics.record(), default=float) + "\n")
+
+def load_model(model_size="base", backend="whisper", model_dir=None):
+  """
+  Load a Whisper model, reusing it if it was already loaded in this process.
+
+  Args:
+      model_size (str): Whisper model size.
+      backend (str): "whisper" (fp32/fp16), "whisper-int8" (dynamically quantized
+          linear layers, CPU) or "ctranslate2" (faster-whisper, int8, CPU).
+      model_dir (str): Local CTranslate2 model directory for the ctranslate2 backend.
+
+  Returns:
+      tuple: The model and a lock serializing its use.
+  """
+  key = (backend, model_size, model_dir)
+  with _models_lock:
+    if key not in _models:
+      _models[key] = (create_model(model_size, backend, model_dir), threading.Lock())
+    return _models[key]
+
+def create_model(model_size="base", backend="whisper", model_dir=None):
+  """
+  Create a model for the given backend.
+
+  Args:
+      model_size (str): Whisper model size.
+      backend (str): One of BACKENDS.
+      model_dir (str): Local CTranslate2 model directory for the ctranslate2 backend.
+
+  Returns:
+      object: The loaded model.
+  """
+  if backend == "ctranslate2":
+    # optional dependency, only needed for this backend
+    from faster_whisper import WhisperModel
+    return WhisperModel(model_dir or model_size, device="cpu", compute_type="int8")
+
+  # whisper pulls in torch, so only import it when a model is needed
+  import whisper
+  if backend == "whisper":
+    return whisper.load_model(model_size)
+
+  import torch
+  model = whisper.load_model(model_size, device="cpu")
+  # Whisper's Linear subclass only adds dtype casting, which is a no-op in fp32 on CPU.
+  # quantize_dynamic matches exact module types, so turn them back into nn.Linear.
+  for module in model.modules():
+    if isinstance(module, torch.nn.Linear):
+      module.__class__ = torch.nn.Linear
+  return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+def run_model(model, audio, options, initial_prompt=None, metrics=None):
+  """
+  Transcribe decoded audio with a model created by create_model.
+
+  Args:
+      model (object): Model returned by load_model.
+      audio (np.ndarray): Mono PCM samples at SAMPLE_RATE.
+      options (TranscribeOptions): Transcription settings.
+      initial_prompt (str): Preceding text, used as decoding context.
+      metrics (TranscribeMetrics): Receives the inference stage times, if given.
+
+  Returns:
+      dict: Whisper-style result with 'text' and 'segments'.
+  """
+  if metrics is None:
+    return _run_model(model, audio, options, initial_prompt)
+
+  encoder = getattr(model, "encoder", None)
+  if encoder is None:
+    with metrics.stage("inference"):
+      return _run_model(model, audio, options, initial_prompt)
+
+  # Whisper computes the mel spectrogram of the whole audio before the first
+  # encoder call, then alternates encoder passes and decoder loops per window.
+  on_gpu = getattr(getattr(model, "device", None), "type", "cpu") == "cuda"
+  if on_gpu:
+    import torch
+  state = {"first": None, "start": 0.0, "encoder": 0.0}
+  def now():
+    if on_gpu:
+      torch.cuda.synchronize()
+    return time.perf_counter()
+  def before_encoder(module, inputs):
+    state["start"] = now()
+    if state["first"] is None:
+      state["first"] = state["start"]
+  def after_encoder(module, inputs, output):
+    state["encoder"] += now() - state["start"]
+
+  handles = [encoder.register_forward_pre_hook(before_encoder), encoder.register_forward_hook(after_encoder)]
+  start_time = time.perf_counter()
+  try:
+    result = _run_model(model, audio, options, initial_prompt)
+  finally:
+    for handle in handles:
+      handle.remove()
+  total = time.perf_counter() - start_time
+  features = (state["first"] or start_time + total) - start_time
+  metrics.add("features", features)
+  metrics.add("encoder", state["encoder"])
+  metrics.add("decoder", max(0.0, total - features - state["encoder"]))
+  return result
+
+def _run_model(model, audio, options, initial_prompt=None):
+  """Run the backend's transcribe and convert its result to Whisper's format."""
+  if options.backend != "ctranslate2":
+    return model.transcribe(audio, language = options.language, fp16 = options.backend == "whisper",
+                            initial_prompt = initial_prompt)
+
+  segments, _ = model.transcribe(audio, language = options.language, initial_prompt = initial_prompt)
+  result_segments = []
+  for segment in segments:
+    result_segments.append({
+      "id": len(result_segments), "start": segment.start, "end": segment.end, "text": segment.text,
+      "avg_logprob": segment.avg_logprob, "no_speech_prob": segment.no_speech_prob,
+    })
+  return {
+    "text": "".join(segment["text"] for segment in result_segments),
+    "segments": result_segments,
+    "language": options.language,
+  }
+
+def frame_energy(audio, frame_length=SAMPLE_RATE // 50):
+  """
+  Compute the RMS energy of consecutive frames.
+
+  Args:
+      audio (np.ndarray): Mono PCM samples at SAMPLE_RATE.
+      frame_length (int): Samples per frame (20 ms by default).
+
+  Returns:
+      np.ndarray: One energy value per frame.
+  """
+  import numpy as np
+  n_frames = len(audio) // frame_length
+  frames = np.asarray(audio[:n_frames * frame_length], dtype=np.float32).reshape(n_frames, frame_length)
+  return np.sqrt(np.mean(frames ** 2, axis=1))
+
+def find_chunk_boundaries(audio, chunk_seconds=60.0, overlap_seconds=1.0, search_seconds=10.0):
+  """
+  Split audio into chunks of about chunk_seconds, cutting at the quietest frame
+  within search_seconds of each target position. Neighbouring chunks overlap by
+  overlap_seconds around the cut.
+
+  Args:
+      audio (np.ndarray): Mono PCM samples at SAMPLE_RATE.
+      chunk_seconds (float): Target chunk length.
+      overlap_seconds (float): Overlap between neighbouring chunks.
+      search_seconds (float): How far from the target a cut may move, at most
+          a quarter of chunk_seconds.
+
+  Returns:
+      list: (start, end) sample ranges.
+  """
+  import numpy as np
+  frame_length = SAMPLE_RATE // 50
+  energy = frame_energy(audio, frame_length)
+  chunk = int(chunk_seconds * SAMPLE_RATE)
+  half_overlap = int(overlap_seconds * SAMPLE_RATE) // 2
+  # a wider window could cut next to the end of the audio and leave a duplicate tail
+  search = int(min(search_seconds, chunk_seconds / 4) * SAMPLE_RATE)
+
+  boundaries = []
+  start = 0
+  # stop early rather than leave a very short last chunk
+  while len(audio) - start > chunk * 1.5:
+    target = start + chunk
+    low = max(start + chunk // 2, target - search) // frame_length
+    high = min(len(energy), (target + search) // frame_length)
+    cut = (low + int(np.argmin(energy[low:high]))) * frame_length + frame_length // 2
+    end = min(len(audio), cut + half_overlap)
+    boundaries.append((start, end))
+    if end >= len(audio):
+      return boundaries
+    start = cut - half_overlap
+  boundaries.append((start, len(audio)))
+  return boundaries
+
+def detect_speech(audio, threshold_db=-30.0, padding_seconds=0.3, min_silence_seconds=1.0):
+  """
+  Find speech regions with an energy-based voice activity detector.
+  A frame is speech if it is louder than the 95th percentile frame level plus
+  threshold_db. Speech is padded on both sides, and pauses shorter than
+  min_silence_seconds are kept as part of the speech.
+
+  Args:
+      audio (np.ndarray): Mono PCM samples at SAMPLE_RATE.
+      threshold_db (float): Speech threshold relative to the loud parts of the audio.
+      padding_seconds (float): Audio kept before and after each region.
+      min_silence_seconds (float): Shortest pause that is removed.
+
+  Returns:
+      list: (start, end) sample ranges of speech.
+  """
+  import numpy as np
+  frame_length = SAMPLE_RATE // 50
+  energy = frame_energy(audio, frame_length)
+  if len(energy) == 0:
+    return []
+  level_db = 20 * np.log10(energy + 1e-10)
+  threshold = max(np.percentile(level_db, 95) + threshold_db, -80.0)
+  is_speech = level_db > threshold
+
+  # pad speech frames on both sides
+  padding = int(padding_seconds * 50)
+  if padding > 0:
+    is_speech = np.convolve(is_speech, np.ones(2 * padding + 1), mode="same") > 0
+
+  # find runs of speech; edges[i] is where the mask switches
+  edges = np.flatnonzero(np.diff(np.concatenate(([0], is_speech.astype(np.int8), [0]))))
+  starts, ends = edges[0::2], edges[1::2]
+  if len(starts) == 0:
+    return []
+
+  # merge regions separated by short pauses
+  keep = np.concatenate(([True], (starts[1:] - ends[:-1]) >= int(min_silence_seconds * 50)))
+  merged_starts = starts[keep]
+  merged_ends = np.concatenate((ends[:-1][keep[1:]], ends[-1:]))
+  return [(int(start) * frame_length, min(len(audio), int(end) * frame_length))
+          for start, end in zip(merged_starts, merged_ends)]
+
+def remove_silence(audio, regions, gap_seconds=0.2):
+  """
+  Join the speech regions into one shorter signal, separated by short gaps.
+
+  Args:
+      audio (np.ndarray): Mono PCM samples at SAMPLE_RATE.
+      regions (list): (start, end) sample ranges to keep.
+      gap_seconds (float): Silence inserted between regions.
+
+  Returns:
+      tuple: The compacted audio and a list of (compact_start, original_start, length)
+      in seconds for mapping timestamps back.
+  """
+  import numpy as np
+  gap = np.zeros(int(gap_seconds * SAMPLE_RATE), dtype=np.float32)
+  pieces = []
+  timeline = []
+  position = 0
+  for start, end in regions:
+    if pieces:
+      pieces.append(gap)
+      position += len(gap)
+    timeline.append((position / SAMPLE_RATE, start / SAMPLE_RATE, (end - start) / SAMPLE_RATE))
+    pieces.append(audio[start:end])
+    position += end - start
+  if not pieces:
+    return np.zeros(0, dtype=np.float32), []
+  return np.concatenate(pieces).astype(np.float32), timeline
+
+def map_to_original(time_seconds, timeline):
+  """
+  Map a timestamp of the compacted audio back to the original timeline.
+
+  Args:
+      time_seconds (float): Timestamp in the compacted audio.
+      timeline (list): Mapping returned by remove_silence.
+
+  Returns:
+      float: Timestamp in the original audio.
+  """
+  if not timeline:
+    return time_seconds
+  index = max(0, bisect.bisect_right([entry[0] for entry in timeline], time_seconds) - 1)
+  compact_start, original_start, length = timeline[index]
+  return original_start + min(max(time_seconds - compact_start, 0.0), length)
+
+def merge_overlap(previous_text, text, max_words=20):
+  """
+  Drop the words at the start of text that repeat the end of previous_text.
+
+  Args:
+      previous_text (str): Text of the preceding chunk.
+      text (str): Text of the following chunk.
+      max_words (int): Longest repeated run to look for.
+
+  Returns:
+      str: text without the repeated words.
+  """
+  def normalize(words):
+    return [word.strip(".,!?;:\"'").lower() for word in words]
+
+  previous_words = normalize(previous_text.split())
+  words = text.split()
+  normalized = normalize(words)
+  for count in range(min(max_words, len(previous_words), len(words)), 0, -1):
+    if previous_words[-count:] == normalized[:count]:
+      return " ".join(words[count:])
+  return " ".join(words)
+
+def configure_threads(threads=None, interop_threads=None):
+  """
+  Set torch's intra-op and inter-op thread counts for this process.
+  Inter-op threads can only be set before torch runs any parallel work.
+
+  Args:
+      threads (int): Intra-op threads, unchanged if None.
+      interop_threads (int): Inter-op threads, unchanged if None.
+  """
+  import torch
+  if threads:
+    torch.set_num_threads(threads)
+  if interop_threads:
+    try:
+      torch.set_num_interop_threads(interop_threads)
+    except RuntimeError as e:
+      print(f"Could not set inter-op threads: {e}")
+
+def partition_cores(parts):
+  """
+  Split the cores this process may run on into parts of (nearly) equal size.
+
+  Args:
+      parts (int): Number of partitions.
+
+  Returns:
+      list: One list of core ids per partition. If there are more parts than
+      cores, cores are shared.
+  """
+  if hasattr(os, "sched_getaffinity"):
+    cores = sorted(os.sched_getaffinity(0))
+  else:
+    cores = list(range(os.cpu_count() or 1))
+  size = len(cores) / parts
+  return [cores[int(i * size):int((i + 1) * size)] or [cores[i % len(cores)]] for i in range(parts)]
+
+def _init_partitioned_worker(partitions, model_size, options):
+  """Pin a worker process to its own core partition, size torch's threads to it and load the model."""
+  cores = partitions.get()
+  if hasattr(os, "sched_setaffinity"):
+    os.sched_setaffinity(0, cores)
+  configure_threads(options.threads or len(cores), options.interop_threads)
+  load_model(model_size, options.backend, options.model_dir)
+
+def create_worker_pool(workers, model_size, options):
+  """
+  Create a process pool whose workers each get an equal share of the cores.
+
+  Args:
+      workers (int): Number of worker processes.
+      model_size (str): Whisper model size loaded by every worker.
+      options (TranscribeOptions): Transcription settings.
+
+  Returns:
+      ProcessPoolExecutor: The pool.
+  """
+  # process pools are only needed with --workers or --jobs, keep them out of startup
+  import multiprocessing
+  from concurrent.futures import ProcessPoolExecutor
+  partitions = partition_cores(workers)
+  queue = multiprocessing.Queue()
+  for cores in partitions:
+    queue.put(cores)
+  threads = options.threads or len(partitions[0])
+  print(f"Starting {workers} workers with {threads} threads each")
+  return ProcessPoolExecutor(max_workers=workers, initializer=_init_partitioned_worker,
+                             initargs=(queue, model_size, options))
+
+def _transcribe_chunk(model_size, options, audio, offset):
+  """Transcribe one chunk in a worker process, shifting timestamps by offset seconds."""
+  model, model_lock = load_model(model_size, options.backend, options.model_dir)
+  with model_lock:
+    result = run_model(model, audio, options)
+  segments = []
+  for segment in result['segments']:
+    segment = dict(segment, start=segment['start'] + offset, end=segment['end'] + offset)
+    segments.append(segment)
+  return {'text': result['text'], 'segments': segments}
+
+def transcribe_chunked(audio, model_size="base", options=None):
+  """
+  Transcribe long audio by splitting it at silences and transcribing the chunks
+  in a process pool, each worker with its own model instance.
+
+  Args:
+      audio (np.ndarray): Mono PCM samples at SAMPLE_RATE.
+      model_size (str): Whisper model size.
+      options (TranscribeOptions): Transcription settings.
+
+  Returns:
+      dict: Whisper-style result with the chunk texts and segments stitched in order.
+  """
+  options = options or TranscribeOptions()
+  boundaries = find_chunk_boundaries(audio, options.chunk_seconds, options.overlap_seconds)
+  workers = min(options.workers, len(boundaries))
+  print(f"Transcribing {len(boundaries)} chunks")
+
+  with create_worker_pool(workers, model_size, options) as executor:
+    futures = [
+      executor.submit(_transcribe_chunk, model_size, options, audio[start:end], start / SAMPLE_RATE)
+      for start, end in boundaries
+    ]
+    chunk_results = [future.result() for future in futures]
+
+  texts = []
+  segments = []
+  for chunk_result in chunk_results:
+    text = chunk_result['text']
+    if texts:
+      text = merge_overlap(texts[-1], text)
+    if text.strip():
+      texts.append(text.strip())
+    # keep only segments that start after the ones already taken from the previous chunk
+    last_end = segments[-1]['end'] if segments else 0.0
+    for segment in chunk_result['segments']:
+      if (segment['start'] + segment['end']) / 2 > last_end:
+        segments.append(dict(segment, id=len(segments)))
+  return {'text': " " + " ".join(texts), 'segments': segments, 'language': options.language}
+
+def hash_file(file_path):
+  """
+  Compute the SHA-256 digest of a file's content.
+
+  Args:
+      file_path (str): Path to the file.
+
+  Returns:
+      str: Hex digest.
+  """
+  digest = hashlib.sha256()
+  with open(file_path, "rb") as f:
+    for block in iter(lambda: f.read(1024 * 1024), b""):
+      digest.update(block)
+  return digest.hexdigest()
+
+def transcribe_result(file_path, model_size="base", options=None, metrics=None):
+  """
+  Transcribe audio file using Whisper ASR and return the full result.
+
+  Args:
+      file_path (str): Path to the audio file.
+      model_size (str): Whisper model size.
+      options (TranscribeOptions): Transcription settings.
+      metrics (TranscribeMetrics): Receives the stage times, if given.
+
+  Returns:
+      dict: Whisper result with 'text', 'segments' and the audio 'duration' in seconds.
+  """
+  options = options or TranscribeOptions()
+  cache = None
+  if options.cache_dir:
+    # the cache only saves time, so an unusable cache directory must not fail the transcription
+    start_time = time.perf_counter()
+    try:
+      cache = DiskCache(options.cache_dir, max_bytes=options.cache_max_mb * 1024 * 1024, suffix=".json")
+      cache_key = make_key(hash_file(file_path), model_size, options.cache_settings())
+      cached = cache.get(cache_key)
+      result = json.loads(cached.decode("utf-8")) if cached is not None else None
+    except Exception as e:
+      print(f"Warning: transcript cache unavailable: {e}")
+      cache = None
+      result = None
+    if metrics is not None:
+      metrics.add("cache", time.perf_counter() - start_time)
+    if result is not None:
+      print(f"Using cached transcription of {file_path}")
+      if metrics is not None:
+        metrics.cached = True
+        metrics.audio_seconds = result['duration']
+      return result
+
+  result = transcribe_uncached(file_path, model_size, options, metrics)
+  if cache is not None:
+    try:
+      cache.put(cache_key, json.dumps(result, default=float).encode("utf-8"))
+    except Exception as e:
+      print(f"Warning: could not cache the transcription: {e}")
+  return result
+
+def transcribe_uncached(file_path, model_size="base", options=None, metrics=None):
+  """
+  Decode and transcribe audio file, applying VAD and chunking as configured.
+
+  Args:
+      file_path (str): Path to the audio file.
+      model_size (str): Whisper model size.
+      options (TranscribeOptions): Transcription settings.
+      metrics (TranscribeMetrics): Receives the stage times, if given.
+
+  Returns:
+      dict: Whisper result with 'text', 'segments' and the audio 'duration' in seconds.
+  """
+  import whisper
+  options = options or TranscribeOptions()
+  metrics = metrics or TranscribeMetrics(file_path)
+  with metrics.stage("audio_decode"):
+    audio = whisper.load_audio(file_path)
+  duration = len(audio) / SAMPLE_RATE
+  metrics.audio_seconds = duration
+
+  timeline = None
+  if options.vad:
+    with metrics.stage("vad"):
+      audio, timeline = remove_silence(audio, detect_speech(audio, options.vad_threshold_db))
+    print(f"VAD kept {len(audio) / SAMPLE_RATE:.1f}s of {duration:.1f}s audio")
+    if len(audio) == 0:
+      return {'text': "", 'segments': [], 'language': options.language, 'duration': duration}
+
+  if options.workers > 1 and len(audio) / SAMPLE_RATE > options.chunk_seconds * 1.5:
+    # the workers load their own models, so their load time is part of inference here
+    with metrics.stage("inference"):
+      result = transcribe_chunked(audio, model_size, options)
+  else:
+    with metrics.stage("load"):
+      model, model_lock = load_model(model_size, options.backend, options.model_dir)
+    with model_lock:
+      result = run_model(model, audio, options, metrics=metrics)
+
+  if timeline is not None:
+    for segment in result['segments']:
+      segment['start'] = map_to_original(segment['start'], timeline)
+      segment['end'] = map_to_original(segment['end'], timeline)
+  result['duration'] = duration
+  return result
+
+def transcribe_streaming(file_path, output_file, model_size="base", options=None, metrics=None):
+  """
+  Transcribe audio file part by part, appending each part's text to output_file
+  as soon as it is decoded. After every part a checkpoint is saved next to the
+  output file, so an interrupted run continues from the last completed part.
+
+  Args:
+      file_path (str): Path to the audio file.
+      output_file (str): File the transcription is appended to, in options.output_format.
+      model_size (str): Whisper model size.
+      options (TranscribeOptions): Transcription settings.
+      metrics (TranscribeMetrics): Receives the stage times, if given.
+
+  Returns:
+      dict: Whisper-style result with 'text', 'segments' and the audio 'duration' in seconds.
+  """
+  import whisper
+  options = options or TranscribeOptions()
+  metrics = metrics or TranscribeMetrics(file_path)
+  with metrics.stage("audio_decode"):
+    audio = whisper.load_audio(file_path)
+  duration = len(audio) / SAMPLE_RATE
+  metrics.audio_seconds = duration
+  timeline = None
+  if options.vad:
+    with metrics.stage("vad"):
+      audio, timeline = remove_silence(audio, detect_speech(audio, options.vad_threshold_db))
+  boundaries = find_chunk_boundaries(audio, options.stream_seconds, overlap_seconds=0.0) if len(audio) else []
+
+  # the checkpoint is only valid for the same audio and settings
+  checkpoint_file = output_file + ".checkpoint.json"
+  checkpoint = {
+    "audio": hash_file(file_path), "model_size": model_size,
+    "settings": options.cache_settings(), "stream_seconds": options.stream_seconds,
+  }
+  next_part = 0
+  segments = []
+  previous_text = ""
+  saved = None
+  if os.path.isfile(checkpoint_file) and os.path.isfile(output_file):
+    with open(checkpoint_file, "r", encoding="utf-8") as f:
+      saved = json.load(f)
+  if saved and all(saved.get(name) == value for name, value in checkpoint.items()):
+    next_part = saved["next_part"]
+    segments = saved["segments"]
+    previous_text = saved["previous_text"]
+    # drop text written after the checkpoint was saved
+    with open(output_file, "r+b") as f:
+      f.truncate(saved["output_bytes"])
+    print(f"Resuming {file_path} from part {next_part + 1}/{len(boundaries)}")
+  else:
+    with open(output_file, "wb") as f:
+      f.write(format_header(options.output_format).encode("utf-8"))
+
+  with metrics.stage("load"):
+    model, model_lock = load_model(model_size, options.backend, options.model_dir)
+  for part in range(next_part, len(boundaries)):
+    start, end = boundaries[part]
+    with model_lock:
+      result = run_model(model, audio[start:end], options, initial_prompt=previous_text[-200:] or None,
+                         metrics=metrics)
+
+    part_segments = []
+    for segment in result['segments']:
+      segment = dict(segment, id=len(segments),
+                     start=segment['start'] + start / SAMPLE_RATE, end=segment['end'] + start / SAMPLE_RATE)
+      if timeline is not None:
+        segment['start'] = map_to_original(segment['start'], timeline)
+        segment['end'] = map_to_original(segment['end'], timeline)
+      segments.append(segment)
+      part_segments.append(segment)
+      if options.stream_jsonl:
+        print(json.dumps(segment_record(segment), ensure_ascii=False, default=float), flush=True)
+
+    text = result['text'].strip()
+    with metrics.stage("format"), open(output_file, "ab") as f:
+      f.write(format_segments(text, part_segments, options.output_format).encode("utf-8"))
+      f.flush()
+      os.fsync(f.fileno())
+      output_bytes = f.tell()
+    previous_text = text or previous_text
+
+    with open(checkpoint_file + ".tmp", "w", encoding="utf-8") as f:
+      json.dump(dict(checkpoint, next_part=part + 1, segments=segments,
+                     previous_text=previous_text, output_bytes=output_bytes), f, default=float)
+    os.replace(checkpoint_file + ".tmp", checkpoint_file)
+
+  if os.path.exists(checkpoint_file):
+    os.remove(checkpoint_file)
+  return {
+    'text': "".join(segment['text'] for segment in segments),
+    'segments': segments,
+    'language': options.language,
+    'duration': duration,
+  }
+
+def transcribe_remote(file_path, model_size="base", server_url="http://127.0.0.1:8765", options=None):
+  """
+  Transcribe audio file on a running WhisperServer.
+
+  Args:
+      file_path (str): Path to the audio file, readable by the server.
+      model_size (str): Whisper model size.
+      server_url (str): Base URL of the server.
+      options (TranscribeOptions): Transcription settings.
+
+  Returns:
+      dict: Whisper result with 'text', 'segments' and the audio 'duration' in seconds.
+  """
+  # urllib.request pulls in http.client and email, only needed with --server
+  import urllib.error
+  import urllib.request
+  options = options or TranscribeOptions()
+  payload = json.dumps({
+    "file_path": os.path.abspath(file_path), "model_size": model_size,
+    "language": options.language, "backend": options.backend, "model_dir": options.model_dir,
+    "vad": options.vad, "vad_threshold_db": options.vad_threshold_db
+  })
+  request = urllib.request.Request(
+    server_url.rstrip("/") + "/transcribe", data=payload.encode("utf-8"),
+    headers={"Content-Type": "application/json"}
+  )
+  try:
+    with urllib.request.urlopen(request) as response:
+      return json.loads(response.read().decode("utf-8"))
+  except urllib.error.HTTPError as e:
+    raise RuntimeError(json.loads(e.read().decode("utf-8")).get("error", str(e)))
+
+def transcribe_audio(file_path, model_size="base", server_url=None, options=None):
   """
   Transcribe audio file to text using Whisper ASR.
-  
+
   Args:
       file_path (str): Path to the audio file.
-  
+      model_size (str): Whisper model size.
+      server_url (str): WhisperServer URL, or None to transcribe in this process.
+      options (TranscribeOptions): Transcription settings.
+
   Returns:
       str: Transcribed text.
   """
-  model = whisper.load_model(model_size)
-  result = model.transcribe(file_path, language = "en")
-  return result['text']
+  if server_url:
+    return transcribe_remote(file_path, model_size, server_url, options)['text']
+  return transcribe_result(file_path, model_size, options)['text']
+
+def format_transcription(text):
+  """
+  Put each sentence of the transcription on its own line.
+
+  Args:
+      text (str): Transcribed text.
+
+  Returns:
+      str: Formatted text.
+  """
+  return text.replace(". ", ".\n").replace("? ", "?\n").replace("! ", "!\n")
+
+def segment_record(segment):
+  """
+  Build the structured record of a segment.
+
+  Args:
+      segment (dict): Whisper segment.
+
+  Returns:
+      dict: id, start, end, text, avg_logprob, no_speech_prob and confidence
+      (the average token probability, exp(avg_logprob)).
+  """
+  avg_logprob = segment.get('avg_logprob')
+  return {
+    "id": segment.get('id'),
+    "start": round(segment['start'], 3),
+    "end": round(segment['end'], 3),
+    "text": segment['text'].strip(),
+    "avg_logprob": avg_logprob,
+    "no_speech_prob": segment.get('no_speech_prob'),
+    "confidence": round(math.exp(avg_logprob), 4) if avg_logprob is not None else None,
+  }
+
+def format_timestamp(seconds, decimal_marker=","):
+  """
+  Format seconds as an SRT (HH:MM:SS,mmm) or WebVTT (HH:MM:SS.mmm) timestamp.
+
+  Args:
+      seconds (float): Time in seconds.
+      decimal_marker (str): "," for SRT, "." for WebVTT.
+
+  Returns:
+      str: Formatted timestamp.
+  """
+  milliseconds = int(round(seconds * 1000))
+  hours, milliseconds = divmod(milliseconds, 3600000)
+  minutes, milliseconds = divmod(milliseconds, 60000)
+  seconds, milliseconds = divmod(milliseconds, 1000)
+  return f"{hours:02d}:{minutes:02d}:{seconds:02d}{decimal_marker}{milliseconds:03d}"
+
+def format_header(output_format):
+  """
+  Return the text that starts an output file of the given format.
+
+  Args:
+      output_format (str): One of OUTPUT_FORMATS.
+
+  Returns:
+      str: File header, empty for most formats.
+  """
+  return "WEBVTT\n\n" if output_format == "vtt" else ""
+
+def format_segments(text, segments, output_format):
+  """
+  Format consecutive segments for appending to an output file.
+
+  Args:
+      text (str): Text of the segments, used for the txt format.
+      segments (list): Whisper segments with consistent ids.
+      output_format (str): "txt", "jsonl", "srt" or "vtt".
+
+  Returns:
+      str: Formatted segments.
+  """
+  if output_format == "txt":
+    return format_transcription(text.strip()) + "\n" if text.strip() else ""
+  if output_format == "jsonl":
+    return "".join(json.dumps(segment_record(segment), ensure_ascii=False, default=float) + "\n"
+                   for segment in segments)
+
+  decimal_marker = "," if output_format == "srt" else "."
+  cues = []
+  for segment in segments:
+    timing = f"{format_timestamp(segment['start'], decimal_marker)} --> {format_timestamp(segment['end'], decimal_marker)}"
+    if output_format == "srt":
+      cues.append(f"{segment['id'] + 1}\n{timing}\n{segment['text'].strip()}\n\n")
+    else:
+      cues.append(f"{timing}\n{segment['text'].strip()}\n\n")
+  return "".join(cues)
+
+def write_output(result, output_file, output_format="txt"):
+  """
+  Write a transcription result in the given format.
+
+  Args:
+      result (dict): Whisper result with 'text' and 'segments'.
+      output_file (str): Output file path.
+      output_format (str): One of OUTPUT_FORMATS.
+  """
+  with open(output_file, "w", encoding="utf-8") as f:
+    if output_format == "txt":
+      # transcription formatting: add new lines after sentences
+      f.write(format_transcription(result['text']))
+    elif output_format == "json":
+      json.dump({
+        "text": result['text'].strip(),
+        "language": result.get('language'),
+        "duration": result.get('duration'),
+        "segments": [segment_record(segment) for segment in result['segments']],
+      }, f, ensure_ascii=False, indent=2, default=float)
+    else:
+      f.write(format_header(output_format))
+      f.write(format_segments(result['text'], result['segments'], output_format))
+
+def find_audio_files(paths):
+  """
+  Expand directories into the audio files they contain.
+
+  Args:
+      paths (list): Audio file and directory paths.
+
+  Returns:
+      list: Audio file paths.
+  """
+  audio_files = []
+  for path in paths:
+    if os.path.isdir(path):
+      for name in sorted(os.listdir(path)):
+        if os.path.splitext(name)[1].lower() in AUDIO_EXTENSIONS:
+          audio_files.append(os.path.join(path, name))
+    else:
+      audio_files.append(path)
+  return audio_files
+
+def transcribe_file(audio_file, model_size="base", server_url=None, options=None, write=True):
+  """
+  Transcribe one audio file and write the result next to it, with the
+  extension of the output format.
+
+  Args:
+      audio_file (str): Path to the audio file.
+      model_size (str): Whisper model size.
+      server_url (str): WhisperServer URL, or None to transcribe in this process.
+      options (TranscribeOptions): Transcription settings.
+      write (bool): Write the output file (streaming always writes).
+
+  Returns:
+      tuple: The result, the output file and its TranscribeMetrics.
+  """
+  options = options or TranscribeOptions()
+  output_file = os.path.splitext(audio_file)[0] + "." + options.output_format
+  result, metrics = transcribe_to_file(audio_file, output_file, model_size, server_url, options, write)
+  return result, output_file, metrics
+
+def transcribe_to_file(audio_file, output_file, model_size="base", server_url=None, options=None, write=True):
+  """
+  Transcribe one audio file to output_file and measure each stage.
+
+  Args:
+      audio_file (str): Path to the audio file.
+      output_file (str): Output file path.
+      model_size (str): Whisper model size.
+      server_url (str): WhisperServer URL, or None to transcribe in this process.
+      options (TranscribeOptions): Transcription settings.
+      write (bool): Write the output file (streaming always writes).
+
+  Returns:
+      tuple: The result and its TranscribeMetrics.
+  """
+  options = options or TranscribeOptions()
+  metrics = TranscribeMetrics(audio_file, model_size, options.backend)
+  start_time = time.perf_counter()
+  if options.stream:
+    result = transcribe_streaming(audio_file, output_file, model_size, options, metrics)
+  elif server_url:
+    with metrics.stage("remote"):
+      result = transcribe_remote(audio_file, model_size, server_url, options)
+    metrics.audio_seconds = result['duration']
+  else:
+    result = transcribe_result(audio_file, model_size, options, metrics)
+
+  if write and not options.stream:
+    with metrics.stage("format"):
+      write_output(result, output_file, options.output_format)
+  metrics.finish(time.perf_counter() - start_time)
+  return result, metrics
+
+def transcribe_files_parallel(audio_files, model_size="base", options=None, jobs=2, write=True):
+  """
+  Transcribe audio files in jobs worker processes, each pinned to its own share
+  of the cores with matching torch thread counts.
+
+  Args:
+      audio_files (list): Paths to the audio files.
+      model_size (str): Whisper model size.
+      options (TranscribeOptions): Transcription settings.
+      jobs (int): Number of files transcribed at the same time.
+      write (bool): Write the output files.
+
+  Returns:
+      list: For each file, the transcribe_file tuple or the exception it raised.
+  """
+  # each job already has its own cores, so don't start chunk workers inside jobs
+  options = replace(options or TranscribeOptions(), workers=1)
+  with create_worker_pool(jobs, model_size, options) as executor:
+    futures = [
+      executor.submit(transcribe_file, audio_file, model_size, None, options, write)
+      for audio_file in audio_files
+    ]
+    outcomes = []
+    for future in futures:
+      try:
+        outcomes.append(future.result())
+      except Exception as e:
+        outcomes.append(e)
+  return outcomes
+
+def transcribe_batch(audio_files, model_size="base", server_url=None, options=None):
+  """
+  Transcribe audio files with a single model load per process. Files run one
+  after another, or options.jobs at a time in parallel processes.
+  Each transcription is written next to its audio file, with the extension of
+  the output format.
+
+  Args:
+      audio_files (list): Paths to the audio files.
+      model_size (str): Whisper model size.
+      server_url (str): WhisperServer URL, or None to transcribe in this process.
+      options (TranscribeOptions): Transcription settings.
+
+  Returns:
+      bool: True if every file was transcribed.
+  """
+  options = options or TranscribeOptions()
+  jobs = 1 if server_url else min(options.jobs, len(audio_files))
+  batch_start_time = time.time()
+  if jobs > 1:
+    outcomes = transcribe_files_parallel(audio_files, model_size, options, jobs)
+  else:
+    if not server_url:
+      start_time = time.time()
+      load_model(model_size, options.backend, options.model_dir)
+      print(f"Model load: {time.time() - start_time:.2f} seconds")
+    outcomes = []
+    for audio_file in audio_files:
+      try:
+        outcomes.append(transcribe_file(audio_file, model_size, server_url, options))
+      except Exception as e:
+        outcomes.append(e)
+
+  total_audio = 0.0
+  total_elapsed = 0.0
+  failed = 0
+  for audio_file, outcome in zip(audio_files, outcomes):
+    if isinstance(outcome, Exception):
+      print(f"Error transcribing {audio_file}: {outcome}")
+      failed += 1
+      continue
+
+    result, output_file, metrics = outcome
+    duration = result['duration']
+    total_audio += duration
+    total_elapsed += metrics.wall_seconds
+    print(f"{audio_file}: {duration:.1f}s audio in {metrics.wall_seconds:.2f}s "
+          f"(RTF {metrics.rtf:.3f}) -> {output_file}")
+    print(f"  {metrics.summary()}")
+    if options.metrics_file:
+      write_metrics(metrics, options.metrics_file)
+
+  wall_time = time.time() - batch_start_time
+  print(f"Transcribed {len(audio_files) - failed}/{len(audio_files)} files: "
+        f"{total_audio:.1f}s audio in {total_elapsed:.2f}s "
+        f"(RTF {total_elapsed / max(total_audio, 1e-6):.3f}, "
+        f"{total_audio / max(wall_time, 1e-6):.1f}x real time over {wall_time:.2f}s wall time)")
+  return failed == 0
 
 if __name__ == "__main__":
   # Check command line arguments
-  if len(sys.argv) != 3:
-    print("Usage: python Speak2Text.py <audio_file_path> <model_size>")
-    print("Example: python Speak2Text.py audio.wav base")
+  parser = argparse.ArgumentParser(
+    usage="python Speak2Text.py <audio_file_path|directory>... <model_size> [options]",
+    epilog="Example: python Speak2Text.py audio.wav base"
+  )
+  parser.add_argument("audio_paths", nargs="+")
+  parser.add_argument("--server", default=os.getenv("SPEAK2TEXT_SERVER"),
+                      help="URL of a running WhisperServer.py (default: $SPEAK2TEXT_SERVER)")
+  parser.add_argument("--workers", type=int, default=1,
+                      help="processes for transcribing chunks of long recordings in parallel")
+  parser.add_argument("--chunk-seconds", type=float, default=60.0,
+                      help="target chunk length for --workers (default: 60)")
+  parser.add_argument("--vad", action="store_true",
+                      help="remove silence before transcribing")
+  parser.add_argument("--vad-threshold", type=float, default=-30.0,
+                      help="speech level in dB relative to the loud parts of the audio (default: -30)")
+  parser.add_argument("--threads", type=int,
+                      help="torch intra-op threads (per job with --jobs)")
+  parser.add_argument("--interop-threads", type=int,
+                      help="torch inter-op threads")
+  parser.add_argument("--jobs", type=int, default=1,
+                      help="files transcribed at the same time in batch mode; cores are split between them")
+  parser.add_argument("--backend", choices=BACKENDS, default="whisper",
+                      help="inference backend; whisper-int8 and ctranslate2 run int8 on CPU")
+  parser.add_argument("--model-dir",
+                      help="local CTranslate2 model directory for --backend ctranslate2")
+  parser.add_argument("--no-cache", action="store_true",
+                      help="always transcribe, ignoring cached results")
+  parser.add_argument("--format", choices=OUTPUT_FORMATS, default="txt",
+                      help="output format; json, jsonl, srt and vtt keep segment timestamps")
+  parser.add_argument("--stream", action="store_true",
+                      help="append text to the output while decoding and resume interrupted runs")
+  parser.add_argument("--stream-seconds", type=float, default=30.0,
+                      help="length of the parts decoded and written at a time with --stream (default: 30)")
+  parser.add_argument("--jsonl", action="store_true",
+                      help="with --stream, also print each segment to stdout as a JSON line")
+  parser.add_argument("--metrics",
+                      help="append a JSON metrics record (stage times, RTF, peak RSS) per file to this file")
+  args = parser.parse_args()
+  if args.stream and args.server:
+    print("--stream is not supported with --server.")
+    sys.exit(1)
+  if args.workers > 1 and args.server:
+    print("--workers is not supported with --server; the server transcribes each file in one process.")
+    sys.exit(1)
+  if args.stream and args.format == "json":
+    print("--stream supports the txt, jsonl, srt and vtt formats.")
+    sys.exit(1)
+  options = TranscribeOptions(
+    backend=args.backend, model_dir=args.model_dir,
+    threads=args.threads, interop_threads=args.interop_threads, jobs=args.jobs,
+    workers=args.workers, chunk_seconds=args.chunk_seconds,
+    vad=args.vad, vad_threshold_db=args.vad_threshold,
+    output_format=args.format, stream=args.stream, stream_seconds=args.stream_seconds, stream_jsonl=args.jsonl,
+    metrics_file=args.metrics
+  )
+  if args.no_cache:
+    options.cache_dir = None
+
+  # Get audio file paths and model size from command line arguments.
+  # The model size is the last argument unless it is an existing file or directory.
+  audio_paths = args.audio_paths
+  model_size = "base"
+  if audio_paths[-1] in MODEL_SIZES or (len(audio_paths) > 1 and not os.path.exists(audio_paths[-1])):
+    model_size = audio_paths.pop()
+  if not audio_paths:
+    parser.print_usage()
     sys.exit(1)
-  
-  # Get audio file path and model size from command line arguments
-  audio_file_path = sys.argv[1]
-  model_size = sys.argv[2]
 
   # Validate model size
-  if model_size not in ["tiny", "base", "small", "medium", "large"]:
+  if model_size not in MODEL_SIZES:
     print("Using 'base' model.")
     model_size = "base"
 
-  try:
-    start_time = time.time()  # Start timing
-    transcription = transcribe_audio(audio_file_path, model_size)
-    end_time = time.time()  # End timing
-
-    # transcription formatting: add new lines after sentences
-    transcription = transcription.replace(". ", ".\n").replace("? ", "?\n").replace("! ", "!\n")
+  # Thread settings of this process; worker processes configure their own
+  if not args.server and (options.threads or options.interop_threads):
+    configure_threads(options.threads, options.interop_threads)
 
-    with open("transcription.txt", "w", encoding="utf-8") as f:
-      f.write(transcription)
+  # Several files or a directory: batch mode with per-file outputs
+  if len(audio_paths) > 1 or os.path.isdir(audio_paths[0]):
+    audio_files = find_audio_files(audio_paths)
+    if not audio_files:
+      print("No audio files found.")
+      sys.exit(1)
+    sys.exit(0 if transcribe_batch(audio_files, model_size, args.server, options) else 1)
 
-    print(f"Elapsed time: {end_time - start_time:.2f} seconds")
+  audio_file_path = audio_paths[0]
+  output_file = f"transcription.{options.output_format}"
+  try:
+    result, metrics = transcribe_to_file(audio_file_path, output_file, model_size, args.server, options)
+    print(f"Elapsed time: {metrics.wall_seconds:.2f} seconds")
+    print(metrics.summary())
+    if options.metrics_file:
+      write_metrics(metrics, options.metrics_file)
   except Exception as e:
     print(f"Error transcribing audio: {e}")
     sys.exit(1)
-
@@ -0,0 +1,173 @@
+"""Speak2TextBench.py
+  Benchmarks for Speak2Text.py on a local sample set.
+  A sample set is a directory of audio files. For accuracy, each audio file may
+  have a reference transcript next to it named <name>.ref.txt.
+
+  backends: transcribes every sample with each inference backend and reports
+            model load time, real-time factor and word error rate.
+  threads:  transcribes the samples with different partitionings of the cores
+            (parallel jobs x threads per job) and reports the throughput of each.
+  Usage: python Speak2TextBench.py backends <sample_dir> [model_size] [--backends whisper,whisper-int8]
+         python Speak2TextBench.py threads <sample_dir> [model_size] [--partitions 1x8,2x4,4x2]
+  Example: python Speak2TextBench.py backends samples/ small
+           python Speak2TextBench.py threads samples/ base
+"""
+import argparse
+import math
+import os
+import re
+import sys
+import time
+import Speak2Text
+
+def normalize_words(text):
+  """Lowercase text and split it into words without punctuation."""
+  return re.sub(r"[^\w\s']", " ", text.lower()).split()
+
+def word_error_rate(reference, hypothesis):
+  """Word-level edit distance divided by the number of reference words."""
+  ref_words = normalize_words(reference)
+  hyp_words = normalize_words(hypothesis)
+  if not ref_words:
+    return 0.0 if not hyp_words else 1.0
+  previous = list(range(len(hyp_words) + 1))
+  for i, ref_word in enumerate(ref_words, 1):
+    current = [i] + [0] * len(hyp_words)
+    for j, hyp_word in enumerate(hyp_words, 1):
+      current[j] = min(
+        previous[j] + 1,  # deletion
+        current[j - 1] + 1,  # insertion
+        previous[j - 1] + (ref_word != hyp_word)  # substitution
+      )
+    previous = current
+  return previous[-1] / len(ref_words)
+
+def load_references(audio_files):
+  """Map audio files to the text of their <name>.ref.txt reference, if any."""
+  references = {}
+  for audio_file in audio_files:
+    reference_file = os.path.splitext(audio_file)[0] + ".ref.txt"
+    if os.path.isfile(reference_file):
+      with open(reference_file, "r", encoding="utf-8") as f:
+        references[audio_file] = f.read()
+  return references
+
+def benchmark_backend(backend, audio_files, references, model_size="base", model_dir=None):
+  """Transcribe all samples with one backend and return its summary row."""
+  options = Speak2Text.TranscribeOptions(backend=backend, model_dir=model_dir, cache_dir=None)
+  start_time = time.time()
+  Speak2Text.load_model(model_size, backend, model_dir)
+  load_time = time.time() - start_time
+
+  total_audio = 0.0
+  total_elapsed = 0.0
+  errors = []
+  for audio_file in audio_files:
+    start_time = time.time()
+    result = Speak2Text.transcribe_result(audio_file, model_size, options)
+    elapsed = time.time() - start_time
+    total_audio += result['duration']
+    total_elapsed += elapsed
+    if audio_file in references:
+      errors.append(word_error_rate(references[audio_file], result['text']))
+    print(f"  {backend} {os.path.basename(audio_file)}: RTF {elapsed / max(result['duration'], 1e-6):.3f}")
+
+  return {
+    "backend": backend,
+    "load": load_time,
+    "rtf": total_elapsed / max(total_audio, 1e-6),
+    "wer": sum(errors) / len(errors) if errors else None,
+  }
+
+def run_backends(args):
+  audio_files = Speak2Text.find_audio_files([args.sample_dir])
+  if not audio_files:
+    print(f"No audio files found in '{args.sample_dir}'.")
+    sys.exit(1)
+  references = load_references(audio_files)
+  print(f"{len(audio_files)} samples, {len(references)} with reference transcripts")
+
+  rows = []
+  for backend in args.backends.split(","):
+    try:
+      rows.append(benchmark_backend(backend, audio_files, references, args.model_size, args.model_dir))
+    except Exception as e:
+      print(f"  {backend}: unavailable ({e})")
+
+  baseline = rows[0]["rtf"] if rows else None
+  print()
+  print(f"{'backend':<14}{'load (s)':>10}{'RTF':>10}{'speedup':>10}{'WER':>10}")
+  for row in rows:
+    wer = f"{row['wer'] * 100:.1f}%" if row["wer"] is not None else "n/a"
+    speedup = baseline / max(row["rtf"], 1e-9)
+    print(f"{row['backend']:<14}{row['load']:>10.2f}{row['rtf']:>10.3f}{speedup:>9.2f}x{wer:>10}")
+
+def default_partitions():
+  """Jobs x threads pairs using all cores, for every power of two number of jobs."""
+  cores = sum(len(part) for part in Speak2Text.partition_cores(1))
+  partitions = []
+  jobs = 1
+  while jobs <= cores:
+    partitions.append((jobs, cores // jobs))
+    jobs *= 2
+  return partitions
+
+def run_threads(args):
+  samples = Speak2Text.find_audio_files([args.sample_dir])
+  if not samples:
+    print(f"No audio files found in '{args.sample_dir}'.")
+    sys.exit(1)
+  if args.partitions:
+    partitions = [tuple(int(n) for n in part.split("x")) for part in args.partitions.split(",")]
+  else:
+    partitions = default_partitions()
+
+  # give every configuration the same work, with at least one file per job
+  max_jobs = max(jobs for jobs, _ in partitions)
+  audio_files = samples * max(args.repeat, math.ceil(max_jobs / len(samples)))
+  print(f"{len(audio_files)} files per configuration")
+
+  rows = []
+  for jobs, threads in partitions:
+    options = Speak2Text.TranscribeOptions(backend=args.backend, threads=threads, cache_dir=None)
+    start_time = time.time()
+    outcomes = Speak2Text.transcribe_files_parallel(audio_files, args.model_size, options, jobs, write=False)
+    wall_time = time.time() - start_time
+
+    results = [outcome for outcome in outcomes if not isinstance(outcome, Exception)]
+    if len(results) < len(outcomes):
+      print(f"  {jobs}x{threads}: {len(outcomes) - len(results)} files failed")
+    total_audio = sum(result['duration'] for result, _, _ in results)
+    mean_rtf = sum(metrics.rtf for _, _, metrics in results) / max(len(results), 1)
+    rows.append((jobs, threads, wall_time, total_audio / max(wall_time, 1e-6), mean_rtf))
+
+  print()
+  print("wall time includes the model load of every job")
+  print(f"{'jobs':>6}{'threads':>9}{'wall (s)':>10}{'x realtime':>12}{'file RTF':>10}")
+  for jobs, threads, wall_time, throughput, mean_rtf in rows:
+    print(f"{jobs:>6}{threads:>9}{wall_time:>10.2f}{throughput:>12.2f}{mean_rtf:>10.3f}")
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(description="Benchmarks for Speak2Text.py")
+  subparsers = parser.add_subparsers(dest="command", required=True)
+
+  backends_parser = subparsers.add_parser("backends", help="compare inference backends")
+  backends_parser.add_argument("sample_dir")
+  backends_parser.add_argument("model_size", nargs="?", default="base", choices=Speak2Text.MODEL_SIZES)
+  backends_parser.add_argument("--backends", default=",".join(Speak2Text.BACKENDS),
+                               help="comma-separated backends, the first is the speed baseline")
+  backends_parser.add_argument("--model-dir", help="local CTranslate2 model directory")
+
+  threads_parser = subparsers.add_parser("threads", help="compare core partitionings between jobs")
+  threads_parser.add_argument("sample_dir")
+  threads_parser.add_argument("model_size", nargs="?", default="base", choices=Speak2Text.MODEL_SIZES)
+  threads_parser.add_argument("--partitions",
+                              help="comma-separated JOBSxTHREADS pairs (default: powers of two over all cores)")
+  threads_parser.add_argument("--repeat", type=int, default=1, help="transcribe each sample this many times")
+  threads_parser.add_argument("--backend", choices=Speak2Text.BACKENDS, default="whisper")
+
+  args = parser.parse_args()
+  if args.command == "backends":
+    run_backends(args)
+  elif args.command == "threads":
+    run_threads(args)
@@ -0,0 +1,76 @@
+"""StartupBench.py
+  Measures how long the command line tools take to start.
+  Each command runs in a fresh interpreter several times and the minimum and median
+  wall times are reported, next to a bare "python -c pass" for reference. Usage
+  errors and --help only need argument handling, so they should stay close to the
+  bare interpreter; heavy libraries (Whisper/torch, PIL, MoviePy, NumPy, OpenAI) are
+  imported by the stages that use them.
+  With --importtime, the slowest imports of each script are listed as well.
+  Usage: python StartupBench.py [--runs 10] [--importtime]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+COMMANDS = [
+  ("python -c pass", ["-c", "pass"]),
+  ("Text2Movie.py (usage)", ["Text2Movie.py"]),
+  ("Text2Movie.py --batch (usage)", ["Text2Movie.py", "--batch"]),
+  ("Speak2Text.py --help", ["Speak2Text.py", "--help"]),
+  ("Speak2TextBench.py --help", ["Speak2TextBench.py", "--help"]),
+]
+
+MODULES = ["Text2Movie", "Speak2Text"]
+
+def time_command(args, runs: int = 10) -> list:
+  """Run python with the given arguments and return the wall time of every run."""
+  times = []
+  for _ in range(runs):
+    start_time = time.perf_counter()
+    subprocess.run([sys.executable] + args, cwd=ROOT, capture_output=True)
+    times.append(time.perf_counter() - start_time)
+  return times
+
+def slowest_imports(module: str, count: int = 10) -> list:
+  """Return (cumulative seconds, module) of the slowest imports of a module, from -X importtime."""
+  output = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          cwd=ROOT, capture_output=True, text=True).stderr
+  imports = []
+  for line in output.splitlines():
+    parts = line.split("|")
+    if len(parts) != 3 or not parts[1].strip().isdigit():
+      continue
+    name = parts[2].rstrip()
+    # only top-level imports of the module, nested ones are part of their parent
+    if name.startswith("   ") and not name.startswith("     "):
+      imports.append((int(parts[1]) / 1e6, name.strip()))
+    elif name.strip() == module:
+      imports.append((int(parts[1]) / 1e6, f"{module} (total)"))
+  return sorted(imports, reverse=True)[:count]
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(description="Startup time of the command line tools")
+  parser.add_argument("--runs", type=int, default=10, help="runs per command (default: 10)")
+  parser.add_argument("--importtime", action="store_true", help="list the slowest imports of each script")
+  args = parser.parse_args()
+
+  print(f"{'command':<32}{'min (ms)':>10}{'median (ms)':>13}{'over python':>13}")
+  baseline = None
+  for label, command in COMMANDS:
+    times = time_command(command, args.runs)
+    best = min(times) * 1000
+    if baseline is None:
+      baseline = best
+    print(f"{label:<32}{best:>10.1f}{statistics.median(times) * 1000:>13.1f}{best - baseline:>13.1f}")
+
+  if args.importtime:
+    for module in MODULES:
+      print()
+      print(f"Slowest imports of {module}:")
+      for seconds, name in slowest_imports(module):
+        print(f"  {seconds * 1000:>8.1f} ms  {name}")
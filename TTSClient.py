@@ -0,0 +1,156 @@
+"""TTSClient.py
+  Rate-limited OpenAI TTS client with retries.
+  Every request first takes a token from a shared token bucket, so concurrent
+  callers stay within the requests-per-minute quota. Throttled (429) and
+  transient server or connection errors are retried with exponential backoff
+  and full jitter, honoring the Retry-After header when the server sends one.
+"""
+import random
+import threading
+import time
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import Optional
+import openai
+
+class TokenBucket:
+  """Thread-safe token bucket limiting how often requests may start. A rate of 0 is unlimited."""
+
+  def __init__(self, rate_per_second: float, capacity: float = 1.0):
+    if rate_per_second < 0:
+      raise ValueError(f"rate_per_second must not be negative, got {rate_per_second}")
+    self.rate_per_second = rate_per_second
+    self.capacity = max(1.0, capacity)
+    self.tokens = self.capacity
+    self.paused_until = 0.0
+    self.last_refill = time.monotonic()
+    self.lock = threading.Lock()
+
+  def _refill(self, now: float):
+    elapsed = now - self.last_refill
+    self.tokens = min(self.capacity, self.tokens + elapsed * self.rate_per_second)
+    self.last_refill = now
+
+  def pause(self, seconds: float):
+    """Stop handing out tokens for the given number of seconds."""
+    with self.lock:
+      self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+  def acquire(self) -> float:
+    """Block until a token is available. Returns the time spent waiting."""
+    waited = 0.0
+    while True:
+      with self.lock:
+        now = time.monotonic()
+        self._refill(now)
+        if now < self.paused_until:
+          wait = self.paused_until - now
+        elif not self.rate_per_second:
+          return waited
+        elif self.tokens >= 1.0:
+          self.tokens -= 1.0
+          return waited
+        else:
+          wait = (1.0 - self.tokens) / self.rate_per_second
+      time.sleep(wait)
+      waited += wait
+
+@dataclass
+class TTSStats:
+  """Counters describing how the TTS client behaved."""
+  requests: int = 0
+  retries: int = 0
+  throttled: int = 0
+  failures: int = 0
+  throttled_seconds: float = 0.0  # waiting for the rate limit: token bucket and 429 delays
+  backoff_seconds: float = 0.0  # waiting before retries of server and connection errors
+
+  def summary(self) -> str:
+    return (f"TTS requests: {self.requests}, retries: {self.retries}, "
+            f"throttled: {self.throttled}, failures: {self.failures}, "
+            f"throttled time: {self.throttled_seconds:.2f}s, backoff time: {self.backoff_seconds:.2f}s")
+
+class TTSClient:
+  """OpenAI speech client with a token-bucket rate limiter and retry/backoff."""
+
+  def __init__(self, api_key: str = None, requests_per_minute: int = 50, max_retries: int = 6,
+               backoff_base: float = 1.0, backoff_max: float = 60.0, base_url: str = None):
+    # retries are handled here, so disable the SDK's own retry loop.
+    # base_url points the client at another server, e.g. MockTTSServer.py.
+    # requests_per_minute of 0 disables the client-side rate limit.
+    self.client = openai.OpenAI(api_key=api_key, base_url=base_url, max_retries=0)
+    self.bucket = TokenBucket(requests_per_minute / 60.0, capacity=max(1, requests_per_minute // 10))
+    self.max_retries = max_retries
+    self.backoff_base = backoff_base
+    self.backoff_max = backoff_max
+    self.stats = TTSStats()
+    self.stats_lock = threading.Lock()
+
+  def _count(self, **increments):
+    with self.stats_lock:
+      for name, value in increments.items():
+        setattr(self.stats, name, getattr(self.stats, name) + value)
+
+  def is_retryable(self, error: Exception) -> bool:
+    """Return True for throttling and transient server or connection errors."""
+    if isinstance(error, (openai.RateLimitError, openai.APIConnectionError)):
+      return True
+    if isinstance(error, openai.APIStatusError):
+      return error.status_code in (408, 409) or error.status_code >= 500
+    return False
+
+  def get_retry_after(self, error: Exception) -> Optional[float]:
+    """Read the server's requested delay in seconds from the error response."""
+    response = getattr(error, "response", None)
+    if response is None:
+      return None
+    headers = response.headers
+    try:
+      if headers.get("retry-after-ms"):
+        return float(headers["retry-after-ms"]) / 1000.0
+      retry_after = headers.get("retry-after")
+      if not retry_after:
+        return None
+      try:
+        return float(retry_after)
+      except ValueError:
+        return max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time())
+    except (TypeError, ValueError):
+      return None
+
+  def get_backoff(self, attempt: int, error: Exception) -> float:
+    """Exponential backoff with full jitter, never shorter than Retry-After."""
+    delay = random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+    retry_after = self.get_retry_after(error)
+    if retry_after is not None:
+      delay = max(delay, retry_after)
+    return delay
+
+  def create_speech(self, model: str, voice: str, text: str, response_format: str = "mp3") -> bytes:
+    """Synthesize text. Raises the last error once retries are exhausted."""
+    attempt = 0
+    while True:
+      waited = self.bucket.acquire()
+      self._count(requests=1, throttled_seconds=waited)
+      try:
+        response = self.client.audio.speech.create(
+          model=model,
+          voice=voice,
+          input=text,
+          response_format=response_format,
+        )
+        return response.content
+      except Exception as e:
+        if not self.is_retryable(e) or attempt >= self.max_retries:
+          self._count(failures=1)
+          raise
+        delay = self.get_backoff(attempt, e)
+        if isinstance(e, openai.RateLimitError):
+          # the quota is shared, so hold back every caller, not just this one
+          self._count(retries=1, throttled=1, throttled_seconds=delay)
+          self.bucket.pause(delay)
+        else:
+          self._count(retries=1, backoff_seconds=delay)
+        print(f"TTS request failed ({e.__class__.__name__}), retrying in {delay:.1f}s")
+        time.sleep(delay)
+        attempt += 1
@@ -2,36 +2,53 @@
   This script processes text input to create video clips with audio using OpenAI's TTS API.
   It extracts paragraphs, splits them into sentences, generates audio for each sentence,
   and creates video clips with the audio and text displayed.
-  Usage: python Text2Movie.py <input_file> <suffix>(optional)
+  With --trace, every stage is timed and written as a Chrome trace (see Tracing.py).
+  --tts-base-url sends the TTS requests to another server, e.g. MockTTSServer.py.
+  Usage: python Text2Movie.py <input_file> <suffix>(optional) [--trace <trace_file>] [--tts-base-url <url>]
+         python Text2Movie.py --batch <input_file|directory|glob>... [--trace <trace_file>] [--tts-base-url <url>]
   Example: python Text2Movie.py input.txt my_suffix_
+           python Text2Movie.py --batch "lessons/*.txt"
+           python Text2Movie.py input.txt --trace trace.json
 """
 import time
 import random
-import openai
+import functools
+import glob
+import multiprocessing
 import sys
 import os
 import re
 import subprocess
-from dataclasses import dataclass
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field, replace
 from pathlib import Path
-from typing import List, Optional
+from typing import TYPE_CHECKING, List, Optional
 import io
+import json
 import wave
-import math
-import struct
-from PIL import Image, ImageDraw, ImageFont
-import numpy as np
-from moviepy.editor import ImageClip, AudioFileClip
 import textwrap
+import unicodedata
+from DiskCache import DiskCache, make_key
+from Tracing import Tracer
+
+# PIL, NumPy, MoviePy and the OpenAI SDK are imported by the stages that use them,
+# so argument errors, --help style usage and batch dispatch start without loading them.
+if TYPE_CHECKING:
+  from PIL import Image
+  from TTSClient import TTSClient
 
 TEST_MODE = False  # Set to True for testing without OpenAI API
+TEST_AUDIO_CHARS_PER_SECOND = 15.0  # speaking rate of the synthetic test audio
+
+_test_audio_cache = {}  # (duration, format) -> encoded test audio, shared by all processors
 
 @dataclass
 class Config:
   """Configuration settings for the Text2Movie application."""
-  temp_audio_file: str = "temp.mp3"
+  temp_audio_file: str = "temp.mp3"  # created inside the per-run scratch directory
+  work_dir_root: Optional[str] = None  # parent of scratch directories, system temp if None
   output_folder: str = "output"
-  temp_silent_file: str = "silence.mp3"
   process_speaker: str = "[Me]"
   video_width: int = 640
   video_height: int = 480
@@ -39,51 +56,119 @@ class Config:
   text_wrap_width: int = 40
   min_sentence_length: int = 30
   fps: int = 30
+  still_image_encoding: bool = True  # encode the static frame with ffmpeg instead of MoviePy
+  still_image_fps: int = 2
+  tts_model: str = "tts-1"
+  tts_response_format: str = "mp3"
+  tts_cache_dir: Optional[str] = ".tts_cache"  # None disables the TTS cache
+  tts_cache_max_mb: int = 512
+  max_tts_in_flight: int = 8  # concurrent TTS requests
+  tts_requests_per_minute: int = 50  # client-side rate limit, unlimited if 0
+  tts_max_retries: int = 6
+  encode_workers: Optional[int] = None  # parallel clip encoders, CPU count if None
+  encode_threads: Optional[int] = None  # threads of each encoder, its share of the CPUs if None
+  speech_speed: float = 1.0
+  incremental_build: bool = True  # reuse unchanged clips listed in the output manifest
+  batch_workers: int = 2  # lessons processed at the same time in batch mode
+  trace_file: Optional[str] = None  # write a Chrome trace of all stages here, tracing is off if None
+  test_mode: bool = field(default_factory=lambda: TEST_MODE)  # synthetic audio instead of the OpenAI API
+  tts_base_url: Optional[str] = None  # alternative speech API server, e.g. MockTTSServer.py
+  test_audio_format: str = "mp3"  # "wav" writes the test audio directly, without ffmpeg
   available_voices: List[str] = None
   
   def __post_init__(self):
     if self.available_voices is None:
       self.available_voices = ["alloy", "echo", "fable", "onyx", "nova", "shimmer"]
 
+@functools.lru_cache(maxsize=None)
+def load_font(font_size: int):
+  """Load the text font once per size and share it between clips."""
+  from PIL import ImageFont
+  try:
+    return ImageFont.truetype("arial.ttf", font_size)
+  except:
+    font = ImageFont.load_default()
+    font.size = font_size
+    return font
+
+def create_tts_client(config: Config) -> "TTSClient":
+  """Create the TTS client from the OPENAI_API_KEY environment variable."""
+  from TTSClient import TTSClient
+  api_key = os.getenv("OPENAI_API_KEY")
+  if not api_key and config.tts_base_url:
+    # other speech servers such as MockTTSServer.py don't check the key, but the SDK needs one
+    api_key = "local"
+  if not api_key:
+    print("Error: OPENAI_API_KEY environment variable not set.")
+    sys.exit(1)
+  return TTSClient(
+    api_key=api_key,
+    requests_per_minute=config.tts_requests_per_minute,
+    max_retries=config.tts_max_retries,
+    base_url=config.tts_base_url
+  )
+
 @dataclass
 class Paragraph:
   """Class to hold speaker and content pairs."""
   speaker: str = ""
   content: str = ""
 
+@dataclass
+class SpeechRequest:
+  """Class to hold a sentence and the voice it is spoken with."""
+  text: str = ""
+  voice: str = ""
+
 @dataclass
 class ReviewCard:
   """Class to hold audio path and text for each review card."""
   audio_path: str = ""
   text: str = ""
+  voice: str = ""
+  key: str = ""
+  clip_path: str = ""  # existing clip reused from a previous run
 
 class Text2MovieProcessor:
   """Main processor class for Text2Movie functionality."""
   
-  def __init__(self, config: Config = None):
+  def __init__(self, config: Config = None, tts_client: "TTSClient" = None, tts_cache: DiskCache = None,
+               tracer: Tracer = None, encode_pool: ProcessPoolExecutor = None):
     self.config = config or Config()
+    # a shared pool of encoder processes, e.g. from process_batch; otherwise each run starts its own
+    self.encode_pool = encode_pool
     self.review_cards: List[ReviewCard] = []
+    self.work_dir: Optional[str] = None
+    self.tts_client = tts_client
+    self.tts_cache = tts_cache
+    # a shared tracer is reported by its owner, e.g. process_batch
+    self.owns_tracer = tracer is None
+    self.tracer = tracer or Tracer(enabled=bool(self.config.trace_file))
+    if self.tts_cache is None and self.config.tts_cache_dir:
+      self.tts_cache = DiskCache(
+        self.config.tts_cache_dir,
+        max_bytes=self.config.tts_cache_max_mb * 1024 * 1024,
+        suffix=f".{self.config.tts_response_format}"
+      )
     
   def process_command_line_args(self) -> tuple:
     """Process command line arguments."""
     if len(sys.argv) < 2:
-      print("Usage: python Text2Movie.py <input_file> <suffix>(optional)")
+      print("Usage: python Text2Movie.py <input_file> <suffix>(optional) [--trace <trace_file>] [--tts-base-url <url>]")
+      print("       python Text2Movie.py --batch <input_file|directory|glob>... [--trace <trace_file>] [--tts-base-url <url>]")
       sys.exit(1)
 
     input_text_file = sys.argv[1]
     suffix = sys.argv[2] if len(sys.argv) > 2 else ""
     return input_text_file, suffix
 
-  def create_movie(self, text: str, audio_file: str, output_file: str = "test_with_audio.mp4"):
-    """Create a movie with the given text and audio file."""
+  def render_frame(self, text: str) -> "Image.Image":
+    """Render the text centered on a white frame."""
+    from PIL import Image, ImageDraw
     img = Image.new('RGB', (self.config.video_width, self.config.video_height), color=(255, 255, 255))
     draw = ImageDraw.Draw(img)
     
-    try:
-      font = ImageFont.truetype("arial.ttf", self.config.font_size)
-    except:
-      font = ImageFont.load_default()
-      font.size = self.config.font_size
+    font = load_font(self.config.font_size)
     
     # Insert newline characters
     text = "\n".join([textwrap.fill(line, width=self.config.text_wrap_width) for line in text.splitlines()])
@@ -95,14 +180,51 @@ class Text2MovieProcessor:
       ((self.config.video_width - text_width) / 2, (self.config.video_height - text_height) / 2),
       text, fill=(0, 0, 0), font=font
     )
-    frame = np.array(img)
+    return img
 
-    audio_clip = AudioFileClip(audio_file)
-    duration = audio_clip.duration - 2.0 / self.config.fps
+  def create_movie(self, text: str, audio_file: str, output_file: str = "test_with_audio.mp4"):
+    """Create a movie with the given text and audio file."""
+    with self.tracer.span("create_movie", clip=os.path.basename(output_file)):
+      with self.tracer.span("render_frame"):
+        img = self.render_frame(text)
+      if self.config.still_image_encoding:
+        self.create_still_movie(img, audio_file, output_file)
+        return
+
+      import numpy as np
+      from moviepy.editor import ImageClip, AudioFileClip
+      frame = np.array(img)
+
+      with self.tracer.span("moviepy encode", "encode"):
+        audio_clip = AudioFileClip(audio_file)
+        duration = audio_clip.duration - 2.0 / self.config.fps
+
+        video_clip = ImageClip(frame).set_duration(duration).set_audio(audio_clip.set_duration(duration))
+        video_clip.write_videofile(output_file, fps=self.config.fps, codec="libx264", audio_codec="aac",
+                                   threads=self.config.encode_threads)
+        audio_clip.close()
+
+  def create_still_movie(self, img: "Image.Image", audio_file: str, output_file: str):
+    """Encode a single still frame with the audio directly through ffmpeg."""
+    with tempfile.TemporaryDirectory(dir=self.work_dir) as frame_dir:
+      frame_file = os.path.join(frame_dir, "frame.png")
+      img.save(frame_file)
+      # Loop the one frame at a low frame rate with a GOP spanning the whole
+      # clip, so the encoder emits a keyframe and then near-empty frames.
+      fps = self.config.still_image_fps
+      threads = ['-threads', str(self.config.encode_threads)] if self.config.encode_threads else []
+      self.run_ffmpeg("still encode", [
+        '-y', '-loop', '1', '-framerate', str(fps), '-i', frame_file,
+        '-i', audio_file,
+        '-c:v', 'libx264', '-tune', 'stillimage', '-pix_fmt', 'yuv420p',
+        '-r', str(fps), '-g', str(fps * 3600), *threads,
+        '-c:a', 'aac', '-shortest', output_file
+      ], check=True, capture_output=True)
 
-    video_clip = ImageClip(frame).set_duration(duration).set_audio(audio_clip.set_duration(duration))
-    video_clip.write_videofile(output_file, fps=self.config.fps, codec="libx264", audio_codec="aac")
-    audio_clip.close()
+  def run_ffmpeg(self, stage: str, args: List[str], **kwargs) -> subprocess.CompletedProcess:
+    """Run ffmpeg with the given arguments as a traced span named after the stage."""
+    with self.tracer.span(f"ffmpeg {stage}", "ffmpeg"):
+      return subprocess.run(['ffmpeg'] + args, **kwargs)
 
   def get_paragraphs(self, input_string: str) -> List[Paragraph]:
     """Extract paragraphs from the input string."""
@@ -138,18 +260,25 @@ class Text2MovieProcessor:
     
     return input_sentences
 
-  def create_test_audio(self):
-    """Create a test audio file with a sine wave."""
-    duration = 2.0  # seconds
+  def create_test_audio(self, text: str = "") -> bytes:
+    """Create test audio with a sine wave, about as long as reading the text aloud."""
+    # Round to 0.1 s so sentences of similar length share one cached result
+    duration = round(max(0.5, len(text) / TEST_AUDIO_CHARS_PER_SECOND), 1)
+    audio_format = self.config.test_audio_format
+    cache_key = (duration, audio_format)
+    if cache_key not in _test_audio_cache:
+      _test_audio_cache[cache_key] = self.encode_test_audio(duration, audio_format)
+    return _test_audio_cache[cache_key]
+
+  def encode_test_audio(self, duration: float, audio_format: str = "mp3") -> bytes:
+    """Generate a 440 Hz sine wave as WAV, converted to MP3 unless audio_format is "wav"."""
+    import numpy as np
     sample_rate = 22050
     frequency = 440.0  # Hz
     amplitude = 32767
 
-    num_samples = int(sample_rate * duration)
-    sine_wave = [
-      int(amplitude * math.sin(2 * math.pi * frequency * t / sample_rate))
-      for t in range(num_samples)
-    ]
+    t = np.arange(int(sample_rate * duration)) / sample_rate
+    sine_wave = (amplitude * np.sin(2 * np.pi * frequency * t)).astype('<i2')
 
     # Write to a WAV file in memory
     wav_buffer = io.BytesIO()
@@ -157,119 +286,286 @@ class Text2MovieProcessor:
       wav_file.setnchannels(1)
       wav_file.setsampwidth(2)
       wav_file.setframerate(sample_rate)
-      wav_file.writeframes(b''.join(struct.pack('<h', s) for s in sine_wave))
-
-    wav_buffer.seek(0)
+      wav_file.writeframes(sine_wave.tobytes())
+    wav_data = wav_buffer.getvalue()
+    if audio_format == "wav":
+      return wav_data
 
     # Convert WAV to MP3 using ffmpeg (if available)
     try:
-      ffmpeg = subprocess.Popen(
-        ['ffmpeg', '-y', '-f', 'wav', '-i', 'pipe:0', '-f', 'mp3', 'pipe:1'],
-        stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE
-      )
-      mp3_data, _ = ffmpeg.communicate(wav_buffer.read())
+      mp3_data = self.run_ffmpeg("test audio",
+        ['-y', '-f', 'wav', '-i', 'pipe:0', '-f', 'mp3', 'pipe:1'],
+        input=wav_data, capture_output=True
+      ).stdout
       if mp3_data:
         return mp3_data
+      error = "no output"
     except Exception as e:
-      print("ffmpeg not available or failed, returning WAV data instead.")
-      return wav_buffer.getvalue()
+      error = e
+    print(f"ffmpeg not available or failed ({error}), returning WAV data instead.")
+    return wav_data
 
-  def get_speak_audio(self, text: str, selected_voice) -> Optional[bytes]:
-    """Get audio from OpenAI TTS API."""
+  def normalize_speech_text(self, text: str) -> str:
+    """Normalize text so that equivalent inputs share one TTS result."""
+    return " ".join(unicodedata.normalize("NFC", text).split())
 
-    if( TEST_MODE ):
-      return self.create_test_audio()
-    try:
-      response = openai.audio.speech.create(
-        model="tts-1",
-        voice=selected_voice,
-        input=text.strip(),
-        response_format="mp3",
-      )
-      return response.content
-    except Exception as e:
-      print(f"Error generating speech: {e}")
-      return None
+  def get_speak_audio(self, text: str, selected_voice) -> Optional[bytes]:
+    """Get audio from OpenAI TTS API, using the on-disk cache when possible."""
+    with self.tracer.span("get_speak_audio", "tts", text=text[:50], voice=selected_voice):
+
+      if( self.config.test_mode ):
+        return self.create_test_audio(text)
+
+      text = self.normalize_speech_text(text)
+      # other speech servers, e.g. MockTTSServer.py, must not fill the cache with their audio
+      cache_key = make_key(self.config.tts_model, selected_voice, text, self.config.tts_response_format,
+                           self.config.tts_base_url)
+      if self.tts_cache is not None:
+        with self.tracer.span("tts cache lookup", "tts"):
+          cached = self.tts_cache.get(cache_key)
+        if cached is not None:
+          return cached
+
+      try:
+        with self.tracer.span("tts request", "tts"):
+          content = self.tts_client.create_speech(
+            model=self.config.tts_model,
+            voice=selected_voice,
+            text=text,
+            response_format=self.config.tts_response_format,
+          )
+      except Exception as e:
+        print(f"Error generating speech: {e}")
+        return None
+
+      if self.tts_cache is not None:
+        try:
+          self.tts_cache.put(cache_key, content)
+        except Exception as e:
+          # a full or read-only cache must not discard audio that was already paid for
+          print(f"Warning: could not cache speech: {e}")
+      return content
+
+  def get_speech_requests(self, paragraphs: List[Paragraph], known_voices: dict = None) -> List[SpeechRequest]:
+    """Collect the sentences to speak, assigning one random voice per paragraph.
+
+    known_voices maps sentences of a previous run to their voice. A paragraph that
+    still contains one of them keeps that voice, so its unchanged cards can be reused.
+    """
+    known_voices = known_voices or {}
+    speech_requests = []
+    for paragraph in paragraphs:
+      if paragraph.speaker.strip() != self.config.process_speaker:
+        continue
 
-  def create_audio_with_silence(self, audio_file: str, speed: float = 1.0):
-    """Add silence to the end of the audio file."""
-    try:
-      # get the duration of the audio file
-      audio_clip = AudioFileClip(self.config.temp_audio_file)
-      # 50% longer than the audio duration plus 1 second
-      silent_duration = int(audio_clip.duration*1.5 + 1.0)
-      audio_clip.close()
-
-      # Create silence file
-      subprocess.run([
-        'ffmpeg', '-y', '-f', 'lavfi', '-i', 'anullsrc=r=44100:cl=mono', 
-        '-t', str(silent_duration), self.config.temp_silent_file
-      ], check=True, capture_output=True)
+      if len(paragraph.content) < self.config.min_sentence_length:
+        continue
 
-      # create "audio_file" with adjusted speed of the temporary audio
-      subprocess.run([
-        'ffmpeg', '-i', self.config.temp_audio_file, '-filter:a', f'atempo={speed}', 
-        '-vn', audio_file
-      ], check=True, capture_output=True)
+      # split paragraph.content into sentences
+      input_sentences = self.split_string_to_sentences(paragraph.content)
 
-      combined_file = f"combined_{audio_file}"
-      with open("concat_list.txt", "w") as f:
-        f.write(f"file '{audio_file}'\n")
-        f.write(f"file '{self.config.temp_silent_file}'\n")
-      
-      subprocess.run([
-        'ffmpeg', '-f', 'concat', '-safe', '0', '-i', 'concat_list.txt', 
-        '-c', 'copy', combined_file
+      selected_voice = next(
+        (known_voices[s.strip()] for s in input_sentences if s.strip() in known_voices), None
+      ) or random.choice(self.config.available_voices)
+      for sentence in input_sentences:
+        speech_requests.append(SpeechRequest(text=sentence.strip(), voice=selected_voice))
+    return speech_requests
+
+  def fetch_speak_audios(self, speech_requests: List[SpeechRequest]) -> List[Optional[bytes]]:
+    """Fetch audio for all requests concurrently. Results keep the request order."""
+    max_in_flight = max(1, self.config.max_tts_in_flight)
+    print(f"Fetching audio for {len(speech_requests)} sentences ({max_in_flight} in flight)")
+    if max_in_flight == 1 or len(speech_requests) <= 1:
+      return [self.get_speak_audio(r.text, r.voice) for r in speech_requests]
+
+    with ThreadPoolExecutor(max_workers=max_in_flight) as executor:
+      return list(executor.map(lambda r: self.get_speak_audio(r.text, r.voice), speech_requests))
+
+  def create_audio_with_silence(self, audio_file: str, speed: float = 1.0) -> bool:
+    """Add silence to the end of the audio file in a single ffmpeg pass."""
+    # The speech is split in two: one copy is sped up, the other is muted and
+    # stretched to 150% of the original duration, padded by 1 second and
+    # appended as the silent tail.
+    filter_graph = (
+      f"[0:a]asplit=2[speech][tail];"
+      f"[speech]atempo={speed}[main];"
+      f"[tail]volume=0,atempo={1 / 1.5:.6f},apad=pad_dur=1.0[silence];"
+      f"[main][silence]concat=n=2:v=0:a=1[out]"
+    )
+    try:
+      self.run_ffmpeg("add silence", [
+        '-y', '-i', self.work_path(self.config.temp_audio_file),
+        '-filter_complex', filter_graph, '-map', '[out]', '-vn', audio_file
       ], check=True, capture_output=True)
-      
-      os.remove("concat_list.txt")
-      os.replace(combined_file, audio_file)
-      
+      return True
     except subprocess.CalledProcessError as e:
       print(f"Error processing audio: {e}")
     except Exception as e:
       print(f"Unexpected error in audio processing: {e}")
-
-  def create_output_files(self, suffix: str, all_movie_file: str):
-    """Create output files for the review cards."""
+    return False
+
+  def encode_movies(self, review_cards: List[ReviewCard], output_files: List[str]):
+    """Encode one clip per review card, in parallel worker processes if configured."""
+    if self.encode_pool is not None:
+      print(f"Encoding {len(output_files)} clips in the shared encoder pool")
+      self.run_encode_jobs(self.encode_pool, self.config, review_cards, output_files)
+      return
+
+    workers = min(self.config.encode_workers or os.cpu_count() or 1, len(output_files))
+    if workers <= 1:
+      for review_card, output_file in zip(review_cards, output_files):
+        self.create_movie(review_card.text, review_card.audio_path, output_file)
+      return
+
+    # every encoder would otherwise start a thread per core, cores x cores threads in total
+    worker_config = self.config
+    if not worker_config.encode_threads:
+      worker_config = replace(worker_config, encode_threads=max(1, (os.cpu_count() or 1) // workers))
+    print(f"Encoding {len(output_files)} clips with {workers} workers, "
+          f"{worker_config.encode_threads} threads each")
+    with create_encode_pool(workers) as executor:
+      self.run_encode_jobs(executor, worker_config, review_cards, output_files)
+
+  def run_encode_jobs(self, executor: ProcessPoolExecutor, config: Config, review_cards: List[ReviewCard],
+                      output_files: List[str]):
+    """Encode the clips in the worker pool and wait for all of them."""
+    # workers trace into their own tracer and send the spans back with the result
+    futures = [
+      executor.submit(encode_movie, config, review_card.text, review_card.audio_path, output_file,
+                      self.tracer.enabled)
+      for review_card, output_file in zip(review_cards, output_files)
+    ]
+    for future in futures:
+      self.tracer.add_events(future.result())
+
+  def verify_output_file(self, path: str) -> bool:
+    """Check that a produced file is non-empty and flush it to disk."""
+    if not os.path.isfile(path) or os.path.getsize(path) == 0:
+      print(f"Output file '{path}' is missing or empty.")
+      return False
+    with open(path, "rb+") as f:
+      os.fsync(f.fileno())
+    return True
+
+  def create_output_files(self, suffix: str, all_movie_file: str) -> bool:
+    """Create output files for the review cards. Returns True once all files are durable."""
     # Create output folder if it doesn't exist
-    if not os.path.exists(self.config.output_folder):
-      if os.path.isdir(self.config.output_folder):
-        import shutil
-        shutil.rmtree(self.config.output_folder)
-      os.makedirs(self.config.output_folder)
+    os.makedirs(self.config.output_folder, exist_ok=True)
+
+    # The concat list lives in the scratch directory so parallel runs don't share it
+    out_file_text = self.work_path("output_files.txt")
+
+    output_files = [
+      os.path.join(self.config.output_folder, f"{suffix}part_{idx}.mp4")
+      for idx in range(len(self.review_cards))
+    ]
+
+    # Clips are renamed and overwritten from here on, so the old manifest no longer
+    # describes them. It is removed first and only rewritten after a successful run.
+    self.remove_manifest(suffix)
 
-    out_file_text = os.path.join(self.config.output_folder, "output_files.txt")
+    # Move reused clips out of the way first, so renumbered clips never overwrite each other
+    staged_files = []
+    try:
+      for review_card, output_file in zip(self.review_cards, output_files):
+        if review_card.clip_path and os.path.abspath(review_card.clip_path) != os.path.abspath(output_file):
+          os.replace(review_card.clip_path, output_file + ".staged")
+          staged_files.append(output_file)
+
+      encode_jobs = [
+        (review_card, output_file)
+        for review_card, output_file in zip(self.review_cards, output_files)
+        if not review_card.clip_path
+      ]
+      print(f"Reusing {len(output_files) - len(encode_jobs)} clips, encoding {len(encode_jobs)}")
+      if encode_jobs:
+        with self.tracer.span("encode_movies", clips=len(encode_jobs)):
+          self.encode_movies([job[0] for job in encode_jobs], [job[1] for job in encode_jobs])
+      while staged_files:
+        output_file = staged_files.pop()
+        os.replace(output_file + ".staged", output_file)
+    finally:
+      # without a manifest nothing refers to the staged clips anymore
+      for output_file in staged_files:
+        if os.path.exists(output_file + ".staged"):
+          os.remove(output_file + ".staged")
+
+    if not all(self.verify_output_file(output_file) for output_file in output_files):
+      return False
 
     # Create output file list
-    with open(out_file_text, "a", encoding="utf-8") as f:
-      for review_card in self.review_cards:
-        base_name = review_card.audio_path.replace('.mp3', '.mp4')
-        output_file = os.path.join(self.config.output_folder, f"{suffix}{base_name}")
-        self.create_movie(review_card.text, review_card.audio_path, output_file)
-        f.write(f"file '{suffix}{base_name}'\n")
+    with open(out_file_text, "w", encoding="utf-8") as f:
+      for output_file in output_files:
+        f.write(f"file '{os.path.abspath(output_file)}'\n")
     
     # Combine videos
+    all_movie_path = os.path.join(self.config.output_folder, all_movie_file)
     try:
-      subprocess.run([
-        "ffmpeg", "-f", "concat", "-safe", "0", "-i", out_file_text, 
-        "-c", "copy", f"{self.config.output_folder}/{all_movie_file}"
+      self.run_ffmpeg("concat", [
+        "-y", "-f", "concat", "-safe", "0", "-i", out_file_text, 
+        "-c", "copy", all_movie_path
       ], check=True)
     except subprocess.CalledProcessError as e:
       print(f"Error combining videos: {e}")
+      return False
+    return self.verify_output_file(all_movie_path)
+
+  def card_key(self, speech_request: SpeechRequest) -> str:
+    """Hash everything that affects a card's clip: text, voice, speech server, speed and video settings."""
+    config = self.config
+    return make_key(
+      self.normalize_speech_text(speech_request.text), speech_request.voice, config.speech_speed,
+      config.tts_model, config.tts_response_format, config.tts_base_url,
+      config.test_mode and config.test_audio_format,
+      config.video_width, config.video_height, config.font_size, config.text_wrap_width,
+      config.fps, config.still_image_encoding, config.still_image_fps
+    )
+
+  def manifest_path(self, suffix: str) -> str:
+    return os.path.join(self.config.output_folder, f"{suffix}manifest.json")
+
+  def remove_manifest(self, suffix: str):
+    """Delete the manifest, so no clip is reused until a run succeeds again."""
+    if os.path.exists(self.manifest_path(suffix)):
+      os.remove(self.manifest_path(suffix))
 
-  def remove_temp_files(self):
-    """Remove temporary files created during the process."""
-    for review_card in self.review_cards:
-      if os.path.exists(review_card.audio_path):
-        os.remove(review_card.audio_path)
-    if os.path.exists(self.config.temp_silent_file):
-      os.remove(self.config.temp_silent_file)
-    if os.path.exists(self.config.temp_audio_file):
-      os.remove(self.config.temp_audio_file)
-
-  def process_text_to_movies(self, input_text_file: str, suffix: str = ""):
-    """Main processing function."""
+  def load_manifest(self, suffix: str) -> dict:
+    """Load the previous run's manifest as a mapping of card key to entry."""
+    try:
+      with open(self.manifest_path(suffix), "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+      return {entry["key"]: entry for entry in manifest["cards"]}
+    except (OSError, ValueError, KeyError, TypeError):
+      return {}
+
+  def save_manifest(self, suffix: str, old_manifest: dict):
+    """Record the clip of every card and delete clips no card uses anymore."""
+    cards = []
+    for idx, review_card in enumerate(self.review_cards):
+      cards.append({
+        "clip": f"{suffix}part_{idx}.mp4",
+        "key": review_card.key,
+        "text": review_card.text,
+        "voice": review_card.voice,
+      })
+
+    current_clips = set(card["clip"] for card in cards)
+    for entry in old_manifest.values():
+      stale_clip = os.path.join(self.config.output_folder, entry["clip"])
+      if entry["clip"] not in current_clips and os.path.exists(stale_clip):
+        os.remove(stale_clip)
+
+    manifest_file = self.manifest_path(suffix)
+    with open(manifest_file + ".tmp", "w", encoding="utf-8") as f:
+      json.dump({"version": 1, "cards": cards}, f, ensure_ascii=False, indent=2)
+    os.replace(manifest_file + ".tmp", manifest_file)
+
+  def work_path(self, name: str) -> str:
+    """Return the path of a scratch file inside this run's work directory."""
+    return os.path.join(self.work_dir, name)
+
+  def process_text_to_movies(self, input_text_file: str, suffix: str = "") -> bool:
+    """Main processing function. Returns True when all outputs were created."""
     # Validate input file
     if not os.path.exists(input_text_file):
       print(f"Input file '{input_text_file}' does not exist.")
@@ -279,57 +575,224 @@ class Text2MovieProcessor:
       input_string = f.read()
 
     # Setup OpenAI API
-    openai.api_key = os.getenv("OPENAI_API_KEY")
-    if not openai.api_key:
-      print("Error: OPENAI_API_KEY environment variable not set.")
-      sys.exit(1)
+    if self.tts_client is None and not self.config.test_mode:
+      self.tts_client = create_tts_client(self.config)
+
+    start_time = time.perf_counter()
+
+    # Every run gets its own scratch directory, removed even if processing fails
+    self.review_cards = []
+    with tempfile.TemporaryDirectory(prefix="text2movie_", dir=self.config.work_dir_root) as work_dir:
+      self.work_dir = work_dir
+      try:
+        with self.tracer.span("process_text", lesson=input_text_file):
+          success = self.process_text(input_string, suffix)
+      finally:
+        self.work_dir = None
+    print(f"Elapsed time: {time.perf_counter() - start_time:.2f} seconds")
+    if self.owns_tracer and self.config.trace_file:
+      self.tracer.report(self.config.trace_file)
+    return success
+
+  def process_text(self, input_string: str, suffix: str = "") -> bool:
+    """Create the review cards and movies for the input text."""
+    manifest = self.load_manifest(suffix) if self.config.incremental_build else {}
+    known_voices = {entry["text"]: entry["voice"] for entry in manifest.values()}
 
     paragraphs = self.get_paragraphs(input_string)
-    
+    speech_requests = self.get_speech_requests(paragraphs, known_voices)
+    card_keys = [self.card_key(speech_request) for speech_request in speech_requests]
+
+    # Find clips of unchanged cards. Each old clip can be reused by one card only.
+    unclaimed = dict(manifest)
+    reuse_clips = []
+    for card_key in card_keys:
+      entry = unclaimed.pop(card_key, None)
+      clip_path = os.path.join(self.config.output_folder, entry["clip"]) if entry else ""
+      reuse_clips.append(clip_path if clip_path and os.path.isfile(clip_path) else "")
+
+    fetch_requests = [r for r, clip_path in zip(speech_requests, reuse_clips) if not clip_path]
+    with self.tracer.span("fetch_speak_audios", sentences=len(fetch_requests)):
+      speaks = iter(self.fetch_speak_audios(fetch_requests))
+    if self.tts_client is not None:
+      print(self.tts_client.stats.summary())
+
     sentence_idx = 0
-    for paragraph in paragraphs:
-      if paragraph.speaker.strip() != self.config.process_speaker:
+    dropped = 0
+    for speech_request, card_key, clip_path in zip(speech_requests, card_keys, reuse_clips):
+      sentence = speech_request.text
+      print(f"Processing sentence: {sentence[:50]}...")
+      if clip_path:
+        print(f"reusing {clip_path}")
+        self.review_cards.append(
+          ReviewCard(text=sentence, voice=speech_request.voice, key=card_key, clip_path=clip_path)
+        )
+        sentence_idx += 1
         continue
 
-      if len(paragraph.content) < self.config.min_sentence_length:
+      speak = next(speaks)
+      if speak is None:
+        print(f"Failed to generate audio for: {sentence[:50]}...")
+        dropped += 1
         continue
 
-      # split paragraph.content into sentences
-      input_sentences = self.split_string_to_sentences(paragraph.content)
+      audio_file = self.work_path(f"part_{sentence_idx}.mp3")
+      print(f"creating {audio_file}")
 
-      selected_voice = random.choice(self.config.available_voices)
-      for sentence in input_sentences:
-        print(f"Processing sentence: {sentence[:50]}...")
-        audio_file = f"part_{sentence_idx}.mp3"
-        print(f"creating {audio_file}")
-        
-        speak = self.get_speak_audio(sentence.strip(), selected_voice)
-        if speak is None:
-          print(f"Failed to generate audio for: {sentence[:50]}...")
-          continue
-          
-        with open(self.config.temp_audio_file, "wb") as out:
+      with self.tracer.span("create_audio_with_silence", sentence=sentence_idx):
+        with open(self.work_path(self.config.temp_audio_file), "wb") as out:
           out.write(speak)
 
-        self.create_audio_with_silence(audio_file)      
-        
-        self.review_cards.append(
-          ReviewCard(audio_path=audio_file, text=sentence.strip())
-        )
-        sentence_idx += 1
+        if not self.create_audio_with_silence(audio_file, self.config.speech_speed):
+          dropped += 1
+          continue
+
+      self.review_cards.append(
+        ReviewCard(audio_path=audio_file, text=sentence, voice=speech_request.voice, key=card_key)
+      )
+      sentence_idx += 1
 
     if self.review_cards:
-      self.create_output_files(suffix, all_movie_file=suffix+"ALL.mp4")
-      
-      # wait for some time to ensure the video is created
-      time.sleep(5)
-      
-      self.remove_temp_files()
-      print(f"Processing complete! Created {len(self.review_cards)} video clips.")
+      with self.tracer.span("create_output_files"):
+        created = self.create_output_files(suffix, all_movie_file=suffix+"ALL.mp4")
+      if created:
+        # the clips that were made are still valid, so the next run only retries the missing cards
+        self.save_manifest(suffix, manifest)
+        if dropped:
+          print(f"Processing incomplete: created {len(self.review_cards)} video clips, "
+                f"{dropped} sentences failed and are missing.")
+          return False
+        print(f"Processing complete! Created {len(self.review_cards)} video clips.")
+        return True
+      print("Processing failed. Some output files were not created.")
     else:
       print("No review cards were created. Check your input file and speaker configuration.")
+    return False
+
+def create_encode_pool(workers: int) -> ProcessPoolExecutor:
+  """Create a pool of encoder processes."""
+  # --batch runs lessons in threads, and forking while they hold locks can deadlock the child
+  return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+
+def encode_movie(config: Config, text: str, audio_file: str, output_file: str, trace: bool = False) -> list:
+  """Encode a single clip. Used as the worker function of the encode process pool.
+
+  Returns the trace spans recorded while encoding, empty if tracing is off.
+  """
+  processor = Text2MovieProcessor(config, tracer=Tracer(enabled=trace))
+  processor.create_movie(text, audio_file, output_file)
+  return processor.tracer.events
+
+def pop_option(args: List[str], name: str) -> Optional[str]:
+  """Remove "name value" from the argument list and return the value, or None if absent."""
+  if name not in args:
+    return None
+  index = args.index(name)
+  if index + 1 >= len(args):
+    print(f"Usage: {name} <value>")
+    sys.exit(1)
+  value = args[index + 1]
+  del args[index:index + 2]
+  return value
+
+def find_input_files(input_patterns: List[str]) -> List[str]:
+  """Expand files, directories (their *.txt files) and glob patterns into input files."""
+  input_files = []
+  for pattern in input_patterns:
+    if os.path.isdir(pattern):
+      matches = glob.glob(os.path.join(pattern, "*.txt"))
+    else:
+      matches = glob.glob(pattern)
+    if not matches:
+      print(f"No input files match '{pattern}'.")
+    for match in sorted(matches):
+      if os.path.isfile(match) and match not in input_files:
+        input_files.append(match)
+  return input_files
+
+def process_batch(input_patterns: List[str], config: Config = None) -> bool:
+  """Process many lessons with a shared TTS client and cache.
+
+  Each lesson is written to its own subfolder of config.output_folder, named after
+  the input file. Lessons run on a pool of config.batch_workers threads and share
+  one pool of encoder processes, which is started once for the whole batch.
+  """
+  config = config or Config()
+  input_files = find_input_files(input_patterns)
+  if not input_files:
+    print("No input files to process.")
+    return False
+
+  tts_client = create_tts_client(config) if not config.test_mode else None
+  tts_cache = None
+  if config.tts_cache_dir:
+    tts_cache = DiskCache(
+      config.tts_cache_dir,
+      max_bytes=config.tts_cache_max_mb * 1024 * 1024,
+      suffix=f".{config.tts_response_format}"
+    )
+  tracer = Tracer(enabled=bool(config.trace_file))
+  lesson_workers = max(1, min(config.batch_workers, len(input_files)))
+  encode_workers = config.encode_workers or os.cpu_count() or 1
+  encode_threads = config.encode_threads or max(1, (os.cpu_count() or 1) // encode_workers)
+
+  lesson_configs = []
+  used_names = set()
+  for input_file in input_files:
+    name = Path(input_file).stem
+    while name in used_names:
+      name += "_"
+    used_names.add(name)
+    lesson_configs.append(replace(
+      config, output_folder=os.path.join(config.output_folder, name), encode_workers=encode_workers,
+      encode_threads=encode_threads
+    ))
+
+  def process_lesson(input_file: str, lesson_config: Config) -> int:
+    processor = Text2MovieProcessor(lesson_config, tts_client=tts_client, tts_cache=tts_cache, tracer=tracer,
+                                    encode_pool=encode_pool)
+    try:
+      if processor.process_text_to_movies(input_file):
+        return len(processor.review_cards)
+    except Exception as e:
+      print(f"Error processing '{input_file}': {e}")
+    print(f"Failed to process '{input_file}'.")
+    return -1
+
+  # the encoder processes and their font cache live for the whole batch, not one lesson
+  encode_pool = create_encode_pool(encode_workers) if encode_workers > 1 else None
+  start_time = time.perf_counter()
+  try:
+    with ThreadPoolExecutor(max_workers=lesson_workers) as executor:
+      card_counts = list(executor.map(process_lesson, input_files, lesson_configs))
+  finally:
+    if encode_pool is not None:
+      encode_pool.shutdown()
+  elapsed = time.perf_counter() - start_time
+
+  succeeded = [count for count in card_counts if count >= 0]
+  total_cards = sum(succeeded)
+  print(f"Batch complete: {len(succeeded)}/{len(input_files)} lessons, {total_cards} cards "
+        f"in {elapsed:.2f} seconds ({total_cards / elapsed:.2f} cards/s, "
+        f"{len(succeeded) * 60 / elapsed:.2f} lessons/min)")
+  if tts_client is not None:
+    print(tts_client.stats.summary())
+  if config.trace_file:
+    tracer.report(config.trace_file)
+  return len(succeeded) == len(input_files)
 
 if __name__ == "__main__":
-  processor = Text2MovieProcessor()
+  config = Config()
+  config.trace_file = pop_option(sys.argv, "--trace")
+  config.tts_base_url = pop_option(sys.argv, "--tts-base-url")
+
+  if len(sys.argv) > 1 and sys.argv[1] == "--batch":
+    if len(sys.argv) < 3:
+      print("Usage: python Text2Movie.py --batch <input_file|directory|glob>... [--trace <trace_file>] [--tts-base-url <url>]")
+      sys.exit(1)
+    sys.exit(0 if process_batch(sys.argv[2:], config) else 1)
+
+  processor = Text2MovieProcessor(config)
   input_text_file, suffix = processor.process_command_line_args()
-  processor.process_text_to_movies(input_text_file, suffix)
+  if not processor.process_text_to_movies(input_text_file, suffix):
+    sys.exit(1)
@@ -0,0 +1,228 @@
+"""Text2MovieBench.py
+  Offline benchmark of the Text2Movie pipeline.
+  Synthetic transcripts of 10, 100 and 1000 sentences are processed in test mode
+  (synthetic audio, no OpenAI API) and every stage is timed with the tracer from
+  Tracing.py: sentence splitting, audio fetching, adding silence, frame rendering,
+  clip encoding, the final concat and the whole run. Requires ffmpeg and ffprobe.
+  Results can be saved as a baseline and later runs compared against it.
+  With --tts-base-url, audio is fetched from a speech server such as MockTTSServer.py
+  through the real TTS client instead, to load test the TTS stage.
+  Usage: python Text2MovieBench.py [--sizes 10,100,1000] [--repeat N] [--save-baseline FILE] [--compare FILE]
+                                   [--tts-base-url URL] [--tts-in-flight N]
+  Example: python Text2MovieBench.py --sizes 10,100 --save-baseline bench_baseline.json
+           python Text2MovieBench.py --sizes 10,100 --compare bench_baseline.json
+           python Text2MovieBench.py --sizes 100 --tts-base-url http://127.0.0.1:8766/v1 --tts-in-flight 16
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict
+from Text2Movie import Config, Text2MovieProcessor, create_tts_client
+from Tracing import Tracer
+
+WORDS = [
+  "yesterday", "I", "went", "to", "the", "station", "with", "my", "friend", "and", "we",
+  "talked", "about", "our", "weekend", "plans", "because", "weather", "was", "really", "nice",
+  "she", "said", "that", "her", "teacher", "gave", "us", "homework", "for", "next", "week",
+  "maybe", "should", "practice", "speaking", "English", "every", "morning", "before", "work",
+]
+
+# (reported stage, span name); times of spans with the same name are summed
+STAGES = [
+  ("fetch audio", "fetch_speak_audios"),
+  ("add silence", "create_audio_with_silence"),
+  ("render frames (sum)", "render_frame"),
+  ("encode clips", "encode_movies"),
+  ("concat", "ffmpeg concat"),
+  ("total", "process_text"),
+]
+
+def synthetic_transcript(sentences: int, seed: int = 0) -> str:
+  """Build a lesson transcript with the given number of sentences for the processed speaker."""
+  rng = random.Random(seed)
+  lines = []
+  remaining = sentences
+  while remaining > 0:
+    count = min(remaining, rng.randint(2, 6))
+    paragraph = []
+    for _ in range(count):
+      words = [rng.choice(WORDS) for _ in range(rng.randint(8, 14))]
+      paragraph.append(" ".join(words).capitalize() + rng.choice([".", ".", "?", "!"]))
+    lines.append("[Me]: " + " ".join(paragraph))
+    lines.append("Teacher: " + " ".join(rng.choice(WORDS) for _ in range(10)) + ".")
+    remaining -= count
+  return "\n".join(lines) + "\n"
+
+def media_duration(path: str):
+  """Duration of a media file in seconds, or None if ffprobe is unavailable."""
+  try:
+    output = subprocess.run([
+      "ffprobe", "-v", "error", "-show_entries", "format=duration", "-of", "csv=p=0", path
+    ], check=True, capture_output=True, text=True).stdout
+    return float(output.strip())
+  except (OSError, subprocess.CalledProcessError, ValueError):
+    return None
+
+def run_pipeline(sentences: int, encode_workers: int = None, verbose: bool = False,
+                 tts_base_url: str = None, tts_in_flight: int = None) -> dict:
+  """Process one synthetic transcript and return the time of every stage in seconds."""
+  with tempfile.TemporaryDirectory(prefix="text2moviebench_") as bench_dir:
+    input_file = os.path.join(bench_dir, "lesson.txt")
+    transcript = synthetic_transcript(sentences)
+    with open(input_file, "w", encoding="utf-8") as f:
+      f.write(transcript)
+
+    config = Config(
+      output_folder=os.path.join(bench_dir, "output"), work_dir_root=bench_dir, tts_cache_dir=None,
+      incremental_build=False, test_mode=not tts_base_url, tts_base_url=tts_base_url,
+      encode_workers=encode_workers
+    )
+    if tts_in_flight:
+      config.max_tts_in_flight = tts_in_flight
+    tts_client = None
+    if tts_base_url:
+      tts_client = create_tts_client(config)
+    tracer = Tracer()
+    processor = Text2MovieProcessor(config, tts_client=tts_client, tracer=tracer)
+
+    start_time = time.perf_counter()
+    speech_requests = processor.get_speech_requests(processor.get_paragraphs(transcript))
+    stages = {"split": time.perf_counter() - start_time}
+
+    output = io.StringIO()
+    with contextlib.redirect_stdout(sys.stdout if verbose else output):
+      success = processor.process_text_to_movies(input_file)
+    if not success:
+      raise RuntimeError(f"pipeline failed for {sentences} sentences\n{output.getvalue()}")
+
+    totals = {}
+    for event in tracer.events:
+      totals[event["name"]] = totals.get(event["name"], 0.0) + event["dur"] / 1e6
+    for stage, span_name in STAGES:
+      stages[stage] = totals.get(span_name, 0.0)
+    result = {
+      "sentences": len(speech_requests),
+      "cards": len(processor.review_cards),
+      "encoded_seconds": media_duration(os.path.join(config.output_folder, "ALL.mp4")),
+      "stages": stages,
+    }
+    if tts_client is not None:
+      result["tts"] = asdict(tts_client.stats)
+    return result
+
+def run_suite(sizes, repeat: int = 1, encode_workers: int = None, verbose: bool = False,
+              tts_base_url: str = None, tts_in_flight: int = None) -> dict:
+  """Run every size repeat times and keep the median time of each stage."""
+  results = {}
+  for size in sizes:
+    runs = []
+    for attempt in range(repeat):
+      print(f"{size} sentences, run {attempt + 1}/{repeat}")
+      runs.append(run_pipeline(size, encode_workers, verbose, tts_base_url, tts_in_flight))
+    result = dict(runs[0])
+    result["stages"] = {
+      stage: statistics.median(run["stages"][stage] for run in runs) for stage in runs[0]["stages"]
+    }
+    results[str(size)] = result
+  return results
+
+def print_results(results: dict):
+  for size, result in results.items():
+    print()
+    encoded = result["encoded_seconds"]
+    encoded_text = f", {encoded:.1f}s of video" if encoded else ""
+    print(f"{size} sentences ({result['cards']} cards{encoded_text})")
+    print(f"  {'stage':<22}{'seconds':>10}{'sentences/s':>13}{'video s/s':>11}")
+    for stage, seconds in result["stages"].items():
+      rate = result["sentences"] / seconds if seconds > 0 else float("inf")
+      video_rate = ""
+      if encoded and stage in ("encode clips", "total") and seconds > 0:
+        video_rate = f"{encoded / seconds:.1f}"
+      print(f"  {stage:<22}{seconds:>10.3f}{rate:>13.1f}{video_rate:>11}")
+    if "tts" in result:
+      tts = result["tts"]
+      print(f"  TTS requests: {tts['requests']}, retries: {tts['retries']}, throttled: {tts['throttled']}, "
+            f"failures: {tts['failures']}, throttled time: {tts['throttled_seconds']:.2f}s, "
+            f"backoff time: {tts['backoff_seconds']:.2f}s")
+
+def environment() -> dict:
+  """Describe the machine and code the results were measured with."""
+  try:
+    commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], check=True, capture_output=True,
+                            text=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+  except (OSError, subprocess.CalledProcessError):
+    commit = None
+  return {
+    "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    "commit": commit,
+    "python": platform.python_version(),
+    "platform": platform.platform(),
+    "cpu_count": os.cpu_count(),
+  }
+
+def compare(results: dict, baseline: dict, threshold: float = 0.10, min_seconds: float = 0.05) -> bool:
+  """Print the change of every stage against the baseline. Returns False on a regression."""
+  print()
+  print(f"Compared with baseline from {baseline['environment'].get('timestamp')} "
+        f"(commit {baseline['environment'].get('commit')})")
+  print(f"  {'size':>6} {'stage':<22}{'baseline':>10}{'now':>10}{'change':>9}")
+  regressions = 0
+  for size, result in results.items():
+    if size not in baseline["results"]:
+      continue
+    old_stages = baseline["results"][size]["stages"]
+    for stage, seconds in result["stages"].items():
+      if stage not in old_stages:
+        continue
+      old = old_stages[stage]
+      change = seconds / old - 1 if old > 0 else 0.0
+      # stages this short are dominated by noise
+      regressed = change > threshold and max(old, seconds) >= min_seconds
+      regressions += regressed
+      print(f"  {size:>6} {stage:<22}{old:>10.3f}{seconds:>10.3f}{change * 100:>8.1f}%"
+            f"{'  slower' if regressed else ''}")
+  if regressions:
+    print(f"{regressions} stages are more than {threshold * 100:.0f}% slower than the baseline.")
+  return regressions == 0
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(description="Offline benchmark of the Text2Movie pipeline")
+  parser.add_argument("--sizes", default="10,100,1000", help="comma-separated transcript sizes in sentences")
+  parser.add_argument("--repeat", type=int, default=1, help="runs per size, the median is reported")
+  parser.add_argument("--encode-workers", type=int, help="parallel clip encoders (default: CPU count)")
+  parser.add_argument("--save-baseline", help="write the results to this JSON file")
+  parser.add_argument("--compare", help="compare the results with a baseline JSON file")
+  parser.add_argument("--threshold", type=float, default=10.0, help="allowed slowdown in percent (default: 10)")
+  parser.add_argument("--verbose", action="store_true", help="show the pipeline's own output")
+  parser.add_argument("--tts-base-url", help="fetch audio from this speech server, e.g. MockTTSServer.py")
+  parser.add_argument("--tts-in-flight", type=int, help="concurrent TTS requests (default: Config.max_tts_in_flight)")
+  args = parser.parse_args()
+
+  baseline = None
+  if args.compare:
+    with open(args.compare, "r", encoding="utf-8") as f:
+      baseline = json.load(f)
+
+  sizes = [int(size) for size in args.sizes.split(",")]
+  try:
+    results = run_suite(sizes, args.repeat, args.encode_workers, args.verbose, args.tts_base_url, args.tts_in_flight)
+  except Exception as e:
+    print(f"Benchmark failed: {e}")
+    sys.exit(1)
+  print_results(results)
+
+  if args.save_baseline:
+    with open(args.save_baseline, "w", encoding="utf-8") as f:
+      json.dump({"environment": environment(), "results": results}, f, indent=2)
+    print(f"Baseline written to {args.save_baseline}")
+  if baseline is not None and not compare(results, baseline, args.threshold / 100):
+    sys.exit(1)
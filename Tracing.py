@@ -0,0 +1,89 @@
+"""Tracing.py
+  Opt-in timing spans for the Text2Movie pipeline.
+  A Tracer records named spans (start, duration, process and thread) and writes
+  them as a Chrome trace, which can be opened in chrome://tracing or
+  https://ui.perfetto.dev. It also prints a summary table with the count, total
+  and percentiles of every span name.
+  Spans from worker processes are collected there and merged into the parent's
+  tracer with add_events. A disabled tracer records nothing.
+"""
+import contextlib
+import json
+import math
+import os
+import threading
+import time
+from typing import List
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+  """Nearest-rank percentile of an ascending list."""
+  if not sorted_values:
+    return 0.0
+  return sorted_values[max(0, math.ceil(fraction * len(sorted_values)) - 1)]
+
+class Tracer:
+  """Thread-safe recorder of timing spans in Chrome trace event format."""
+
+  def __init__(self, enabled: bool = True):
+    self.enabled = enabled
+    self.events = []
+    self.lock = threading.Lock()
+
+  @contextlib.contextmanager
+  def span(self, name: str, category: str = "stage", **args):
+    """Record the time spent in the with block as a span."""
+    if not self.enabled:
+      yield
+      return
+    # perf_counter is a system-wide monotonic clock, so spans of worker processes line up
+    start = time.perf_counter()
+    try:
+      yield
+    finally:
+      end = time.perf_counter()
+      event = {
+        "name": name, "cat": category, "ph": "X",
+        "ts": start * 1e6, "dur": (end - start) * 1e6,
+        "pid": os.getpid(), "tid": threading.get_ident(),
+      }
+      if args:
+        event["args"] = args
+      with self.lock:
+        self.events.append(event)
+
+  def add_events(self, events: list):
+    """Merge spans recorded by another tracer, e.g. in a worker process."""
+    if self.enabled and events:
+      with self.lock:
+        self.events.extend(events)
+
+  def write_chrome_trace(self, path: str):
+    """Write the spans as a Chrome trace JSON file."""
+    with self.lock:
+      events = sorted(self.events, key=lambda event: event["ts"])
+    with open(path, "w", encoding="utf-8") as f:
+      json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+  def summary(self) -> str:
+    """Return a table with the count, total and percentiles of each span name in seconds."""
+    with self.lock:
+      durations = {}
+      for event in self.events:
+        durations.setdefault(event["name"], []).append(event["dur"] / 1e6)
+
+    lines = [f"{'span':<28}{'count':>7}{'total':>10}{'mean':>9}{'p50':>9}{'p95':>9}{'max':>9}"]
+    for name, values in sorted(durations.items(), key=lambda item: -sum(item[1])):
+      values.sort()
+      lines.append(
+        f"{name[:27]:<28}{len(values):>7}{sum(values):>10.3f}{sum(values) / len(values):>9.3f}"
+        f"{percentile(values, 0.5):>9.3f}{percentile(values, 0.95):>9.3f}{values[-1]:>9.3f}"
+      )
+    return "\n".join(lines)
+
+  def report(self, path: str):
+    """Write the Chrome trace to path and print the summary table."""
+    if not self.enabled:
+      return
+    self.write_chrome_trace(path)
+    print(self.summary())
+    print(f"Trace written to {path}")
@@ -0,0 +1,96 @@
+"""WhisperServer.py
+  Local transcription server that keeps Whisper models loaded between requests.
+  Models are loaded on first use (or at startup if listed) and stay resident,
+  so each request only pays for inference. Speak2Text.py talks to it with --server.
+  Only listens on localhost; audio files are read from the local filesystem.
+  Usage: python WhisperServer.py [port] [model_size]...
+  Example: python WhisperServer.py 8765 base small
+
+  Endpoints:
+    POST /transcribe  {"file_path": ..., "model_size": "base", "language": "en", "backend": "whisper",
+                       "model_dir": null, "vad": false, "vad_threshold_db": -30}
+    GET  /health      loaded models
+"""
+import json
+import os
+import sys
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import Speak2Text
+
+DEFAULT_PORT = 8765
+
+class TranscriptionHandler(BaseHTTPRequestHandler):
+  """Serve transcription requests from the models loaded in this process."""
+
+  def send_json(self, status: int, body: dict):
+    data = json.dumps(body, default=float).encode("utf-8")
+    self.send_response(status)
+    self.send_header("Content-Type", "application/json")
+    self.send_header("Content-Length", str(len(data)))
+    self.end_headers()
+    self.wfile.write(data)
+
+  def do_GET(self):
+    if self.path != "/health":
+      self.send_json(404, {"error": "not found"})
+      return
+    models = [f"{backend}:{model_dir or model_size}" for backend, model_size, model_dir in Speak2Text._models]
+    self.send_json(200, {"models": sorted(models)})
+
+  def do_POST(self):
+    if self.path != "/transcribe":
+      self.send_json(404, {"error": "not found"})
+      return
+    try:
+      length = int(self.headers.get("Content-Length", 0))
+      request = json.loads(self.rfile.read(length).decode("utf-8"))
+      file_path = request["file_path"]
+      model_size = request.get("model_size", "base")
+      language = request.get("language", "en")
+      backend = request.get("backend", "whisper")
+      model_dir = request.get("model_dir")
+      vad = bool(request.get("vad", False))
+      vad_threshold_db = float(request.get("vad_threshold_db", -30.0))
+    except (ValueError, KeyError, TypeError) as e:
+      self.send_json(400, {"error": f"bad request: {e}"})
+      return
+    if model_size not in Speak2Text.MODEL_SIZES:
+      self.send_json(400, {"error": f"unknown model size '{model_size}'"})
+      return
+    if backend not in Speak2Text.BACKENDS:
+      self.send_json(400, {"error": f"unknown backend '{backend}'"})
+      return
+    if not os.path.isfile(file_path):
+      self.send_json(404, {"error": f"audio file '{file_path}' does not exist"})
+      return
+
+    try:
+      options = Speak2Text.TranscribeOptions(language=language, backend=backend, model_dir=model_dir,
+                                             vad=vad, vad_threshold_db=vad_threshold_db)
+      result = Speak2Text.transcribe_result(file_path, model_size, options)
+    except Exception as e:
+      self.send_json(500, {"error": str(e)})
+      return
+    self.send_json(200, result)
+
+if __name__ == "__main__":
+  port = DEFAULT_PORT
+  args = sys.argv[1:]
+  if args and args[0].isdigit():
+    port = int(args.pop(0))
+  for model_size in args:
+    if model_size not in Speak2Text.MODEL_SIZES:
+      print(f"Unknown model size '{model_size}'.")
+      print("Usage: python WhisperServer.py [port] [model_size]...")
+      sys.exit(1)
+    print(f"Loading '{model_size}' model...")
+    Speak2Text.load_model(model_size)
+
+  server = ThreadingHTTPServer(("127.0.0.1", port), TranscriptionHandler)
+  print(f"Whisper server listening on http://127.0.0.1:{port}")
+  try:
+    server.serve_forever()
+  except KeyboardInterrupt:
+    pass
+  finally:
+    server.server_close()